@@ -1,4 +1,11 @@
-from .connection import DuckDBMongoDB
-from .operations_speaker_notes import DatabaseSpeakerNotesOperations
+try:
+    from .connection import DuckDBMongoDB
+    from .mirror import ChangeStreamMirror
+    from .operations_speaker_notes import DatabaseSpeakerNotesOperations
+except ImportError:
+    # Loaded as a plain directory (pytest, scripts run from here): the modules import each other flat
+    from connection import DuckDBMongoDB
+    from mirror import ChangeStreamMirror
+    from operations_speaker_notes import DatabaseSpeakerNotesOperations
 
-__all__ = ['DuckDBMongoDB', 'DatabaseSpeakerNotesOperations']
+__all__ = ['DuckDBMongoDB', 'ChangeStreamMirror', 'DatabaseSpeakerNotesOperations']
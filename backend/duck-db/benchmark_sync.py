@@ -0,0 +1,132 @@
+"""
+Sync benchmark: copy a large synthetic SPEAKER_NOTES collection into DuckDB and report throughput and RSS.
+
+Fills a scratch MongoDB database with N notes, then times DuckDBMongoDB.copy_collection while a
+thread samples the process RSS. With a file-backed DuckDB the peak should not depend on N; with
+':memory:' the table itself lives in RAM and grows with the collection:
+
+    uv run python benchmark_sync.py --notes 5000000
+    uv run python benchmark_sync.py --notes 5000000 --skip-seed --batch-size 50000
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from config import Config, COLLECTIONS
+from connection import DuckDBMongoDB
+
+WORDS = ["note", "réunion", "projet", "idée", "client", "budget", "planning", "équipe", "rapport", "action",
+         "titre", "liste", "gras", "question", "réponse", "demain", "objectif", "suivi", "priorité", "tâche"]
+COMMANDS = ["titre", "sous-titre", "gras", "italique", "liste", "retour à la ligne"]
+
+
+def build_notes(start: int, count: int, now: datetime) -> list:
+    """Notes shaped like the API writes them: content of 20-80 words, a few commands, timestamps"""
+    notes = []
+    for i in range(start, start + count):
+        content = " ".join(random.choices(WORDS, k=random.randint(20, 80)))
+        created_at = now - timedelta(minutes=i)
+        notes.append({
+            "id_note": i,
+            "title": f"Note {i}",
+            "content": content,
+            "preview": content[:100],
+            "commands": random.sample(COMMANDS, k=random.randint(0, 3)),
+            "schema_version": "1.0.0",
+            "created_at": created_at,
+            "updated_at": created_at,
+        })
+    return notes
+
+
+def seed(collection, notes: int, batch_size: int):
+    collection.drop()
+    now = datetime.now()
+    for start in range(0, notes, batch_size):
+        collection.insert_many(build_notes(start, min(batch_size, notes - start), now), ordered=False)
+
+
+def current_rss() -> int:
+    """Resident set size of this process in bytes (Linux)"""
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+class RssSampler(threading.Thread):
+    """Track the peak RSS while the sync runs"""
+
+    def __init__(self, interval: float = 0.05):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = current_rss()
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.is_set():
+            self.peak = max(self.peak, current_rss())
+            self._done.wait(self.interval)
+
+    def stop(self) -> int:
+        self._done.set()
+        self.join()
+        return self.peak
+
+
+def run(notes: int, batch_size: int, duckdb_path: str, memory_limit: str, skip_seed: bool, keep: bool):
+    db_name = f"{Config.MONGO_DB_NAME}_sync_bench"
+    connection = DuckDBMongoDB(db_name=db_name, batch_size=batch_size, duckdb_path=duckdb_path).connect()
+    collection_name = COLLECTIONS["SPEAKER_NOTES"]
+    try:
+        if connection.duck_conn is None or connection.mongo_client is None:
+            raise Exception("Connection not established")
+        if memory_limit:
+            connection.duck_conn.execute(f"SET memory_limit = '{memory_limit}'")
+        collection = connection.get_mongo_collection(collection_name)
+        if not skip_seed:
+            print(f"📦 Loading {notes:,} synthetic notes...")
+            start = time.perf_counter()
+            seed(collection, notes, 10_000)
+            print(f"  fixture ready in {time.perf_counter() - start:.1f} s")
+
+        baseline = current_rss()
+        sampler = RssSampler()
+        sampler.start()
+        start = time.perf_counter()
+        copied = connection.copy_collection(collection_name, collection_name)
+        elapsed = time.perf_counter() - start
+        peak = sampler.stop()
+
+        print(f"⏱️ copy_collection: {copied:,} notes in {elapsed:.1f} s ({copied / elapsed:,.0f} docs/s), batch size {batch_size:,}")
+        print(f"🧠 RSS: {baseline / 2**20:,.0f} MB before, peak {peak / 2**20:,.0f} MB (+{(peak - baseline) / 2**20:,.0f} MB), DuckDB at {duckdb_path}")
+    finally:
+        if not keep and connection.mongo_client is not None:
+            connection.mongo_client.drop_database(db_name)
+        connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MongoDB -> DuckDB sync benchmark")
+    parser.add_argument("--notes", type=int, default=5_000_000, help="Number of synthetic notes")
+    parser.add_argument("--batch-size", type=int, default=Config.SYNC_BATCH_SIZE, help="Documents streamed into DuckDB per batch")
+    parser.add_argument("--duckdb-path", default=None, help="DuckDB database file (default: a temporary file; ':memory:' keeps the table in RAM)")
+    parser.add_argument("--memory-limit", default="1GB", help="DuckDB memory_limit during the run")
+    parser.add_argument("--skip-seed", action="store_true", help="Reuse the notes loaded by a previous --keep run")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch database afterwards")
+    args = parser.parse_args()
+
+    if args.duckdb_path:
+        run(args.notes, args.batch_size, args.duckdb_path, args.memory_limit, args.skip_seed, args.keep)
+        return
+    with tempfile.TemporaryDirectory() as directory:
+        run(args.notes, args.batch_size, os.path.join(directory, "sync_bench.duckdb"), args.memory_limit, args.skip_seed, args.keep)
+
+
+if __name__ == "__main__":
+    main()
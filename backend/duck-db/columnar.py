@@ -0,0 +1,112 @@
+import json
+from datetime import datetime
+from typing import Optional, Dict, Any, List
+import numpy as np
+from config import COLLECTIONS
+
+# Declared DuckDB column types of the synced collections: tables are created from them (see table_ddl)
+# Missing fields become NULL (list columns also wrap legacy bare values, see _to_list); readers COALESCE where
+# they need a value. Fields a collection has but that are not declared here are inferred from the batch
+TABLE_SCHEMAS: Dict[str, Dict[str, str]] = {
+    COLLECTIONS["SPEAKER_NOTES"]: {
+        "_id": "VARCHAR",
+        "id_note": "INTEGER",
+        "title": "VARCHAR",
+        "content": "VARCHAR",
+        "preview": "VARCHAR",
+        "commands": "VARCHAR[]",
+        "schema_version": "VARCHAR",
+        "created_at": "TIMESTAMP",
+        "updated_at": "TIMESTAMP",
+    },
+    COLLECTIONS["COMMANDS"]: {
+        "_id": "VARCHAR",
+        "id_command": "INTEGER",
+        "command_name": "VARCHAR",
+        "command_vocal": "VARCHAR[]",
+        "command_description": "VARCHAR",
+        "html_tag_start": "VARCHAR",
+        "html_tag_end": "VARCHAR",
+        "schema_version": "VARCHAR",
+        "created_at": "TIMESTAMP",
+        "updated_at": "TIMESTAMP",
+    },
+}
+
+# Python values DuckDB infers a type for; other BSON values (ObjectId, Decimal128...) are stored as text
+INFERRED_TYPES = (str, bool, int, float, datetime)
+
+# Name under which a decoded batch is registered in DuckDB
+BATCH_VIEW = "tmp_mongo_batch"
+
+def get_table_schema(collection_name: str) -> Dict[str, str]:
+    """Declared column types of a collection (only _id for collections not declared here)"""
+    return TABLE_SCHEMAS.get(collection_name, {"_id": "VARCHAR"})
+
+def _object_array(values: List[Any]) -> np.ndarray:
+    # np.array() would turn a column of equal-length lists into a 2-D array
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
+
+def _to_varchar(value: Any) -> Optional[str]:
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str)
+    return str(value)
+
+def _to_list(value: Any, item_type: str) -> Optional[List[Any]]:
+    # Legacy documents hold a bare value (e.g. a string command_vocal) where the schema expects a
+    # list: wrap it like the API migration (pipeline_to_v1_0_1) does, otherwise the CAST raises a
+    # ConversionException and the whole sync fails. A missing value stays NULL
+    if value is None:
+        return None
+    if not isinstance(value, list):
+        value = [value]
+    if item_type == "VARCHAR":
+        return [_to_varchar(item) for item in value]
+    return value
+
+def _decode_column(values: List[Any], column_type: Optional[str]) -> np.ndarray:
+    """One column of a batch as a numpy array DuckDB can scan"""
+    if column_type == "VARCHAR":
+        return _object_array([_to_varchar(value) for value in values])
+    if column_type is not None and column_type.endswith("[]"):
+        return _object_array([_to_list(value, column_type[:-2]) for value in values])
+    if column_type is None:
+        # Undeclared field: nested values are kept as JSON text, plain scalars are inferred by DuckDB
+        return _object_array([value if value is None or isinstance(value, INFERRED_TYPES) else _to_varchar(value) for value in values])
+    # Datetimes and numbers are converted by DuckDB itself through the CAST in batch_query
+    return _object_array(values)
+
+def decode_batch(documents: List[Dict[str, Any]], schema: Dict[str, str]) -> Dict[str, np.ndarray]:
+    """Decode a batch of MongoDB documents column by column into numpy arrays.
+
+    DuckDB scans a dict of numpy arrays directly, so no DataFrame is built, the documents are
+    left untouched and typing, NULLs and JSON encoding happen in DuckDB's vectorised casts.
+    """
+    columns = list(schema)
+    seen = set(columns)
+    for doc in documents:
+        for key in doc:
+            if key not in seen:
+                seen.add(key)
+                columns.append(key)
+    return {
+        column: _decode_column([doc.get(column) for doc in documents], schema.get(column))
+        for column in columns
+    }
+
+def table_ddl(table_name: str, schema: Dict[str, str]) -> str:
+    """CREATE TABLE statement of an empty table with the declared columns"""
+    columns = ", ".join(f'"{column}" {column_type}' for column, column_type in schema.items())
+    return f"CREATE TABLE {table_name} ({columns})"
+
+def batch_query(batch: Dict[str, np.ndarray], schema: Dict[str, str]) -> str:
+    """SELECT over the registered batch casting every declared column to its declared type"""
+    select_list = [
+        f'CAST("{column}" AS {schema[column]}) AS "{column}"' if column in schema else f'"{column}"'
+        for column in batch
+    ]
+    return f"SELECT {', '.join(select_list)} FROM {BATCH_VIEW}"
@@ -10,6 +10,13 @@ class Config:
     
     # DuckDB settings
     DUCKDB_PATH = os.getenv('DUCKDB_PATH', ':memory:')  # Use :memory: for in-memory DB
+    DUCKDB_MEMORY_LIMIT = os.getenv('DUCKDB_MEMORY_LIMIT')  # e.g. '1GB'; unset keeps DuckDB's default (80% of RAM)
+    SYNC_BATCH_SIZE = int(os.getenv('SYNC_BATCH_SIZE', '10000'))  # Documents streamed into DuckDB per batch
+    SYNC_LOOKBACK_SECONDS = float(os.getenv('SYNC_LOOKBACK_SECONDS', '60'))  # Incremental syncs re-read this far behind the watermark
+    
+    # Change stream mirror settings (needs a replica set, even a single-node one)
+    MIRROR_BATCH_SIZE = int(os.getenv('MIRROR_BATCH_SIZE', '500'))  # Max events applied per DuckDB transaction
+    MIRROR_FLUSH_SECONDS = float(os.getenv('MIRROR_FLUSH_SECONDS', '1.0'))  # Max delay before a partial batch is applied
     
     # Logging
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
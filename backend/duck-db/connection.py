@@ -1,19 +1,45 @@
 import duckdb
 import pymongo
-from typing import Optional, Dict, Any, List
-import json
+from typing import Optional, Dict, Any, Iterator, List
 import logging
+import time
+from datetime import datetime, timedelta
+from bson import ObjectId
 from config import Config
+from columnar import BATCH_VIEW, batch_query, decode_batch, get_table_schema, table_ddl
 
 logger = logging.getLogger(__name__)
 
+# DuckDB table holding the per-table incremental sync watermarks
+WATERMARK_TABLE = "sync_watermarks"
+
+# Minimum delay between two progress lines of a long copy
+PROGRESS_EVERY_SECONDS = 2.0
+
+def iter_batches(cursor, batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+    """Consume a cursor as lists of at most batch_size documents"""
+    batch = []
+    for document in cursor:
+        batch.append(document)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
 class DuckDBMongoDB:
-    def __init__(self, mongo_uri: str = Config.MONGO_URI, db_name: str = Config.MONGO_DB_NAME):
+    def __init__(self, mongo_uri: str = Config.MONGO_URI, db_name: str = Config.MONGO_DB_NAME,
+                 batch_size: int = Config.SYNC_BATCH_SIZE, duckdb_path: str = Config.DUCKDB_PATH):
         self.mongo_uri = mongo_uri
         self.db_name = db_name
+        self.duckdb_path = duckdb_path
+        # Documents fetched, decoded and written to DuckDB at a time during a sync
+        self.batch_size = batch_size
         self.mongo_client = None
         self.mongo_db = None
         self.duck_conn = None
+        # table name -> ChangeStreamMirror keeping it up to date (see mirror.py)
+        self.mirrors = {}
         
     # Initialize the DuckDBMongoDB connection with MongoDB URI and database name
     def connect(self):
@@ -29,8 +55,10 @@ class DuckDBMongoDB:
             self.mongo_client.admin.command('ping')
             self.mongo_db = self.mongo_client[self.db_name]
             
-            # Create DuckDB connection (in-memory for fast analytics)
-            self.duck_conn = duckdb.connect(':memory:')
+            # Create DuckDB connection (in-memory by default for fast analytics; a file keeps mirrors resumable)
+            # DUCKDB_MEMORY_LIMIT caps DuckDB's buffer pool; a file-backed database spills to disk beyond it
+            duck_config = {'memory_limit': Config.DUCKDB_MEMORY_LIMIT} if Config.DUCKDB_MEMORY_LIMIT else {}
+            self.duck_conn = duckdb.connect(self.duckdb_path, config=duck_config)
             
             logger.info("Successfully connected to MongoDB Docker and DuckDB")
             return self
@@ -41,7 +69,9 @@ class DuckDBMongoDB:
     
     # Sync MongoDB collection to DuckDB table for analytics
     # If table_name is not provided, it defaults to the collection name
-    def sync_mongo_to_duckdb(self, collection_name: str, table_name: Optional[str] = None):
+    # The first call copies the whole collection, later calls only upsert the documents changed since
+    # the table watermark (see sync_watermarks); full_refresh=True forces a rebuild
+    def sync_mongo_to_duckdb(self, collection_name: str, table_name: Optional[str] = None, full_refresh: bool = False):
         """Sync MongoDB collection to DuckDB table for analytics"""
         if not table_name:
             table_name = collection_name
@@ -52,46 +82,235 @@ class DuckDBMongoDB:
             if self.duck_conn is None:
                 raise Exception("DuckDB connection not established. Call connect() first.")
 
-            print(f"🔄 Syncing MongoDB collection '{collection_name}' to DuckDB table '{table_name}'...")
+            mirror = self.mirrors.get(table_name)
+            if mirror is not None and mirror.is_running() and not full_refresh:
+                logger.info(f"{table_name} is kept up to date by its change stream mirror")
+                return
+
             collection = self.mongo_db[collection_name]
-            documents = list(collection.find())
-            
-            if documents:
-                import pandas as pd
-                processed_docs = []
-                for doc in documents:
-                    if '_id' in doc:
-                        doc['_id'] = str(doc['_id'])
-                    for key, value in doc.items():
-                        if isinstance(value, (dict, list)):
-                            doc[key] = json.dumps(value)
-                        elif value is None:
-                            doc[key] = ""
-                    processed_docs.append(doc)
-                df = pd.DataFrame(processed_docs)
-                # Register the DataFrame as a DuckDB view, then create the table from it
-                self.duck_conn.execute(f"DROP TABLE IF EXISTS {table_name}")
-                self.duck_conn.register('tmp_mongo_df', df)
-                self.duck_conn.execute(f"CREATE TABLE {table_name} AS SELECT * FROM tmp_mongo_df")
-                self.duck_conn.unregister('tmp_mongo_df')
-                logger.info(f"Synced {len(processed_docs)} documents from {collection_name} to DuckDB")
+            watermark = None if full_refresh else self._get_watermark(table_name)
+            if watermark is not None and self._schema_changed(table_name, get_table_schema(collection_name)):
+                # Tables synced with older declared types are rebuilt rather than patched
+                watermark = None
+            if watermark is None:
+                self._full_sync(collection, collection_name, table_name)
             else:
-                self.duck_conn.execute(f"DROP TABLE IF EXISTS {table_name}")
-                self.duck_conn.execute(f"CREATE TABLE {table_name} (placeholder VARCHAR)")
-                logger.info(f"Created empty table {table_name} - no documents found in {collection_name}")
+                self._incremental_sync(collection, collection_name, table_name, watermark)
             
         except Exception as e:
             logger.error(f"Failed to sync {collection_name}: {e}")
             raise
 
+    # Copy the whole collection into a fresh DuckDB table and record its watermark
+    def _full_sync(self, collection, collection_name: str, table_name: str):
+        """Drop and rebuild the DuckDB table from the whole collection"""
+        print(f"🔄 Syncing MongoDB collection '{collection_name}' to DuckDB table '{table_name}'...")
+        copied = self.copy_collection(collection_name, table_name)
+        if copied:
+            logger.info(f"Synced {copied} documents from {collection_name} to DuckDB")
+        else:
+            logger.info(f"Created empty table {table_name} - no documents found in {collection_name}")
+
+    # Rebuild a DuckDB table from the whole collection, streaming the cursor batch_size documents at a time
+    # so memory stays bounded whatever the collection size. The copy goes to a staging table swapped in at
+    # the end: readers keep the previous table meanwhile. conn defaults to duck_conn
+    def copy_collection(self, collection_name: str, table_name: str, conn=None) -> int:
+        """Full copy of collection_name into table_name; return the number of documents copied"""
+        conn = conn or self.duck_conn
+        collection = self.get_mongo_collection(collection_name)
+        schema = get_table_schema(collection_name)
+        staging_table = f"{table_name}__staging"
+        conn.execute(f"DROP TABLE IF EXISTS {staging_table}")
+        # The table is typed by its declared schema, even when the collection is empty
+        conn.execute(table_ddl(staging_table, schema))
+        copied, watermark = self._copy_cursor(
+            collection.find(batch_size=self.batch_size), staging_table, schema,
+            conn, total=collection.estimated_document_count(), label=table_name
+        )
+        try:
+            conn.execute("BEGIN TRANSACTION")
+            conn.execute(f"DROP TABLE IF EXISTS {table_name}")
+            conn.execute(f"ALTER TABLE {staging_table} RENAME TO {table_name}")
+            if copied:
+                self._save_watermark(table_name, watermark, conn)
+            else:
+                # No watermark is recorded, so the next call retries a full sync
+                self._delete_watermark(table_name, conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return copied
+
+    # Upsert the documents changed since the watermark into the existing DuckDB table
+    # updated_at catches edits, _id catches inserts that carry no updated_at
+    # Both are stamped by the writer before its write commits, so a write committed after the
+    # previous read can carry an older stamp than the watermark: the read starts
+    # SYNC_LOOKBACK_SECONDS behind it. Re-applying a document is harmless (upsert by _id)
+    def _incremental_sync(self, collection, collection_name: str, table_name: str, watermark: Dict[str, Any]):
+        """Pull only the documents changed since the last sync and upsert them by _id"""
+        lookback = timedelta(seconds=Config.SYNC_LOOKBACK_SECONDS)
+        conditions = []
+        if watermark['updated_at'] is not None:
+            conditions.append({'updated_at': {'$gte': watermark['updated_at'] - lookback}})
+        if watermark['last_id'] is not None:
+            last_id = ObjectId(watermark['last_id'])
+            conditions.append({'_id': {'$gt': ObjectId.from_datetime(last_id.generation_time - lookback)}})
+        if not conditions:
+            self._full_sync(collection, collection_name, table_name)
+            return
+
+        cursor = collection.find({'$or': conditions}, batch_size=self.batch_size)
+        try:
+            self.duck_conn.execute("BEGIN TRANSACTION")
+            upserted, new_watermark = self._copy_cursor(
+                cursor, table_name, get_table_schema(collection_name), self.duck_conn, watermark=watermark, upsert=True
+            )
+            if upserted:
+                self._save_watermark(table_name, new_watermark)
+            self.duck_conn.execute("COMMIT")
+        except Exception:
+            self.duck_conn.execute("ROLLBACK")
+            raise
+        if upserted:
+            logger.info(f"Upserted {upserted} documents from {collection_name} to DuckDB")
+        else:
+            logger.info(f"{table_name} is up to date with {collection_name}")
+
+    # Upsert changed documents and remove deleted ones from an existing DuckDB table, then advance its watermark
+    # The caller owns the transaction; conn defaults to duck_conn (other threads pass their own cursor)
+    # schema is the declared column types of the source collection (see columnar.TABLE_SCHEMAS)
+    def apply_changes(self, table_name: str, documents: List[Dict[str, Any]], deleted_ids: Optional[List[Any]] = None,
+                      watermark: Optional[Dict[str, Any]] = None, schema: Optional[Dict[str, str]] = None, conn=None):
+        """Replace rows by _id with the given raw MongoDB documents and delete deleted_ids"""
+        conn = conn or self.duck_conn
+        if documents:
+            if watermark is None:
+                watermark = self._get_watermark(table_name, conn)
+            self._write_batch(conn, table_name, documents, schema if schema is not None else get_table_schema(table_name), upsert=True)
+            self._save_watermark(table_name, self._watermark_of(documents, watermark), conn)
+        if deleted_ids:
+            conn.execute(
+                f"DELETE FROM {table_name} WHERE _id IN (SELECT UNNEST(?::VARCHAR[]))",
+                [[str(document_id) for document_id in deleted_ids]]
+            )
+
+    # Stream a cursor into a DuckDB table one batch at a time, reporting progress as it goes
+    # Only one batch of documents and its decoded columns are held in memory at once
+    def _copy_cursor(self, cursor, table_name: str, schema: Dict[str, str], conn, total: Optional[int] = None,
+                     watermark: Optional[Dict[str, Any]] = None, upsert: bool = False, label: Optional[str] = None):
+        """Write every batch of the cursor to the existing table_name; return (count, watermark)"""
+        copied = 0
+        started = last_report = time.monotonic()
+        for documents in iter_batches(cursor, self.batch_size):
+            watermark = self._watermark_of(documents, watermark)
+            self._write_batch(conn, table_name, documents, schema, upsert=upsert)
+            copied += len(documents)
+            now = time.monotonic()
+            if now - last_report >= PROGRESS_EVERY_SECONDS:
+                last_report = now
+                self._report_progress(label or table_name, copied, total, now - started)
+        if copied >= self.batch_size:
+            self._report_progress(label or table_name, copied, total, time.monotonic() - started)
+        return copied, watermark
+
+    def _report_progress(self, table_name: str, copied: int, total: Optional[int], elapsed: float):
+        rate = copied / elapsed if elapsed > 0 else 0
+        progress = f"{copied:,}/{total:,}" if total else f"{copied:,}"
+        print(f"📦 {table_name}: {progress} documents ({rate:,.0f} docs/s)", flush=True)
+
+    # Write one batch of raw MongoDB documents: INSERT for a copy, DELETE + INSERT by _id for upserts
+    def _write_batch(self, conn, table_name: str, documents: List[Dict[str, Any]], schema: Dict[str, str], upsert: bool = False):
+        batch = decode_batch(documents, schema)
+        query = batch_query(batch, schema)
+        conn.register(BATCH_VIEW, batch)
+        try:
+            self._add_missing_columns(conn, table_name, query)
+            if upsert:
+                # DuckDB 1.3 has no MERGE, and a primary key would slow every bulk copy down: replace rows by _id
+                conn.execute(f"DELETE FROM {table_name} WHERE _id IN (SELECT _id FROM {BATCH_VIEW})")
+            conn.execute(f"INSERT INTO {table_name} BY NAME {query}")
+        finally:
+            conn.unregister(BATCH_VIEW)
+
+    def _columns(self, conn, relation: str) -> Dict[str, str]:
+        """Column name -> DuckDB type of a table or a query"""
+        return {row[0]: row[1] for row in conn.execute(f"DESCRIBE {relation}").fetchall()}
+
+    def _schema_changed(self, table_name: str, schema: Dict[str, str]) -> bool:
+        """True when a declared column is missing from the table or has another type"""
+        try:
+            columns = self._columns(self.duck_conn, table_name)
+        except duckdb.CatalogException:
+            return True
+        return any(columns.get(column) != column_type for column, column_type in schema.items())
+
+    # Add the columns a batch of changed documents brings that the table does not have yet
+    def _add_missing_columns(self, conn, table_name: str, query: str):
+        """ALTER the table so INSERT ... BY NAME accepts the new fields"""
+        existing = self._columns(conn, table_name)
+        for column_name, column_type in self._columns(conn, query).items():
+            if column_name not in existing:
+                conn.execute(f'ALTER TABLE {table_name} ADD COLUMN "{column_name}" {column_type}')
+
+    # Highest updated_at and ObjectId seen in a batch of raw MongoDB documents
+    def _watermark_of(self, documents: List[Dict[str, Any]], previous: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Advance the watermark past a batch of documents"""
+        updated_at = previous['updated_at'] if previous else None
+        last_id = ObjectId(previous['last_id']) if previous and previous['last_id'] else None
+        for doc in documents:
+            doc_updated_at = doc.get('updated_at')
+            if isinstance(doc_updated_at, datetime) and (updated_at is None or doc_updated_at > updated_at):
+                updated_at = doc_updated_at
+            doc_id = doc.get('_id')
+            if isinstance(doc_id, ObjectId) and (last_id is None or doc_id > last_id):
+                last_id = doc_id
+        return {'updated_at': updated_at, 'last_id': str(last_id) if last_id else None}
+
+    # Per-table sync watermarks, stored next to the tables they describe
+    def _ensure_watermark_table(self, conn=None):
+        (conn or self.duck_conn).execute(f"""
+            CREATE TABLE IF NOT EXISTS {WATERMARK_TABLE} (
+                table_name VARCHAR PRIMARY KEY,
+                updated_at TIMESTAMP,
+                last_id VARCHAR,
+                synced_at TIMESTAMP
+            )
+        """)
+
+    def _get_watermark(self, table_name: str, conn=None) -> Optional[Dict[str, Any]]:
+        """Watermark of table_name, or None if it was never fully synced"""
+        conn = conn or self.duck_conn
+        self._ensure_watermark_table(conn)
+        row = conn.execute(
+            f"SELECT updated_at, last_id FROM {WATERMARK_TABLE} WHERE table_name = ?", [table_name]
+        ).fetchone()
+        if row is None:
+            return None
+        return {'updated_at': row[0], 'last_id': row[1]}
+
+    def _save_watermark(self, table_name: str, watermark: Dict[str, Any], conn=None):
+        conn = conn or self.duck_conn
+        self._ensure_watermark_table(conn)
+        conn.execute(
+            f"INSERT OR REPLACE INTO {WATERMARK_TABLE} VALUES (?, ?, ?, ?)",
+            [table_name, watermark['updated_at'], watermark['last_id'], datetime.now()]
+        )
+
+    def _delete_watermark(self, table_name: str, conn=None):
+        conn = conn or self.duck_conn
+        self._ensure_watermark_table(conn)
+        conn.execute(f"DELETE FROM {WATERMARK_TABLE} WHERE table_name = ?", [table_name])
+
     # Execute query on DuckDB and return results
-    def query_duckdb(self, query: str) -> List[Dict]:
+    # params are bound to the ? placeholders of the query, keeping their native types
+    def query_duckdb(self, query: str, params: Optional[List[Any]] = None) -> List[Dict]:
         """Execute query on DuckDB and return results"""
         try:
             if self.duck_conn is None:
                 raise Exception("DuckDB connection not established. Call connect() first.")
             
-            cursor = self.duck_conn.execute(query)
+            cursor = self.duck_conn.execute(query, params)
             result = cursor.fetchall()
             
             if result and len(result) > 0:
@@ -116,6 +335,8 @@ class DuckDBMongoDB:
     # Close all connections
     def close(self):
         """Close all connections"""
+        for mirror in list(self.mirrors.values()):
+            mirror.stop()
         if self.mongo_client:
             self.mongo_client.close()
         if self.duck_conn:
@@ -0,0 +1,198 @@
+import threading
+import time
+from datetime import datetime
+import logging
+from typing import Optional, Dict, Any, List
+from bson import json_util
+from pymongo.errors import OperationFailure, PyMongoError
+from connection import DuckDBMongoDB
+from columnar import get_table_schema
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# DuckDB table holding the last change stream resume token applied to each mirrored table
+RESUME_TOKEN_TABLE = "sync_resume_tokens"
+
+# Server error raised when the resume token fell off the oplog
+CHANGE_STREAM_HISTORY_LOST = 286
+
+# Events that end a collection change stream: the mirror has to start over from a full sync
+INVALIDATING_EVENTS = ("drop", "rename", "dropDatabase", "invalidate")
+
+class _Resync(Exception):
+    """The change stream cannot be resumed: rebuild the table and open a new stream"""
+
+class ChangeStreamMirror:
+    """Keep a DuckDB table in step with a MongoDB collection through a change stream.
+
+    start() opens the stream before doing a full sync, so nothing written during the copy is lost,
+    then a background thread applies inserts, updates and deletes in micro-batches
+    (MIRROR_BATCH_SIZE events or MIRROR_FLUSH_SECONDS, whichever comes first).
+    Each batch and its resume token are committed in the same DuckDB transaction, so with a file
+    DUCKDB_PATH a restarted mirror resumes exactly where it stopped.
+    Change streams need a replica set; a single-node one is enough (see run_mirror.py).
+    """
+
+    def __init__(self, connection: DuckDBMongoDB, collection_name: str, table_name: Optional[str] = None,
+                 batch_size: int = Config.MIRROR_BATCH_SIZE, flush_seconds: float = Config.MIRROR_FLUSH_SECONDS):
+        self.connection = connection
+        self.collection_name = collection_name
+        self.table_name = table_name or collection_name
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.applied_events = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._conn = None
+
+    # Start mirroring: resume from the stored token, or full sync from a freshly opened stream
+    def start(self):
+        """Initial sync if needed, then apply changes in a background thread"""
+        if self.connection.duck_conn is None:
+            raise Exception("DuckDB connection not established. Call connect() first.")
+        # DuckDB connections are not shared across threads: the mirror writes through its own cursor
+        self._conn = self.connection.duck_conn.cursor()
+        self._ensure_token_table()
+        resume_token = self._load_token()
+        if resume_token is None:
+            resume_token = self._initial_sync()
+        self._stop.clear()
+        self.connection.mirrors[self.table_name] = self
+        self._thread = threading.Thread(target=self._run, args=(resume_token,), name=f"mirror-{self.table_name}", daemon=True)
+        self._thread.start()
+        print(f"🪞 Mirroring MongoDB collection '{self.collection_name}' into DuckDB table '{self.table_name}'")
+        return self
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    # Stop the background thread; the last committed token stays stored for the next start()
+    def stop(self, timeout: Optional[float] = None):
+        """Stop mirroring after the batch in progress"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout if timeout is not None else self.flush_seconds + 5)
+            self._thread = None
+        self.connection.mirrors.pop(self.table_name, None)
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    # Open the stream first so every write made during the full copy is replayed afterwards
+    def _initial_sync(self) -> Dict[str, Any]:
+        """Full sync of the table; return the token it is consistent from"""
+        collection = self.connection.get_mongo_collection(self.collection_name)
+        with collection.watch(full_document='updateLookup') as stream:
+            resume_token = stream.resume_token
+        self.connection.sync_mongo_to_duckdb(self.collection_name, self.table_name, full_refresh=True)
+        self._save_token(resume_token)
+        return resume_token
+
+    def _run(self, resume_token: Dict[str, Any]):
+        collection = self.connection.get_mongo_collection(self.collection_name)
+        while not self._stop.is_set():
+            try:
+                with collection.watch(full_document='updateLookup', resume_after=resume_token,
+                                      max_await_time_ms=max(int(self.flush_seconds * 1000), 1)) as stream:
+                    while not self._stop.is_set() and stream.alive:
+                        events = self._next_batch(stream)
+                        next_token = stream.resume_token
+                        if events or next_token != resume_token:
+                            self._apply(events, next_token)
+                            # Only advance once committed: a failed batch is replayed from the old token
+                            resume_token = next_token
+            except _Resync as e:
+                print(f"⚠️ {e} - resyncing DuckDB table '{self.table_name}'")
+                resume_token = self._resync()
+            except OperationFailure as e:
+                if e.code != CHANGE_STREAM_HISTORY_LOST:
+                    logger.error(f"Change stream on {self.collection_name} failed: {e}")
+                    self._stop.wait(1)
+                    continue
+                print(f"⚠️ Resume token for '{self.table_name}' is no longer in the oplog - resyncing")
+                resume_token = self._resync()
+            except PyMongoError as e:
+                # The driver already retried once; keep the stored token and reopen the stream
+                logger.error(f"Change stream on {self.collection_name} interrupted: {e}")
+                self._stop.wait(1)
+            except Exception as e:
+                logger.error(f"Mirror of {self.collection_name} failed, retrying: {e}")
+                self._stop.wait(1)
+
+    def _resync(self) -> Dict[str, Any]:
+        """Rebuild the table from a new stream; the analytics thread must not sync it meanwhile"""
+        collection = self.connection.get_mongo_collection(self.collection_name)
+        with collection.watch(full_document='updateLookup') as stream:
+            resume_token = stream.resume_token
+        self.connection.copy_collection(self.collection_name, self.table_name, conn=self._conn)
+        self._save_token(resume_token)
+        return resume_token
+
+    # Collect events until the batch is full or flush_seconds passed since the first one
+    def _next_batch(self, stream) -> List[Dict[str, Any]]:
+        events = []
+        deadline = None
+        while len(events) < self.batch_size and not self._stop.is_set():
+            event = stream.try_next()
+            if event is None:
+                if deadline is None or time.monotonic() >= deadline:
+                    break
+                continue
+            if event['operationType'] in INVALIDATING_EVENTS:
+                raise _Resync(f"Collection '{self.collection_name}' got a {event['operationType']} event")
+            events.append(event)
+            if deadline is None:
+                deadline = time.monotonic() + self.flush_seconds
+            if time.monotonic() >= deadline:
+                break
+        return events
+
+    # Apply a micro-batch and its resume token in one DuckDB transaction
+    def _apply(self, events: List[Dict[str, Any]], resume_token: Dict[str, Any]):
+        """Keep the last state of every document: its full document, or None once deleted"""
+        latest: Dict[Any, Optional[Dict[str, Any]]] = {}
+        for event in events:
+            document_id = event['documentKey']['_id']
+            if event['operationType'] == 'delete':
+                latest[document_id] = None
+            elif event['operationType'] in ('insert', 'update', 'replace'):
+                # updateLookup returns None when the document was deleted after the update
+                latest[document_id] = event.get('fullDocument')
+        documents = [doc for doc in latest.values() if doc is not None]
+        deleted_ids = [document_id for document_id, doc in latest.items() if doc is None]
+
+        try:
+            self._conn.execute("BEGIN TRANSACTION")
+            self.connection.apply_changes(self.table_name, documents, deleted_ids,
+                                          schema=get_table_schema(self.collection_name), conn=self._conn)
+            self._save_token(resume_token)
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        if events:
+            self.applied_events += len(events)
+            logger.info(f"Mirrored {len(documents)} upserts and {len(deleted_ids)} deletes into {self.table_name}")
+
+    # Resume tokens are stored as extended JSON next to the table they belong to
+    def _ensure_token_table(self):
+        self._conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {RESUME_TOKEN_TABLE} (
+                table_name VARCHAR PRIMARY KEY,
+                resume_token VARCHAR,
+                updated_at TIMESTAMP
+            )
+        """)
+
+    def _load_token(self) -> Optional[Dict[str, Any]]:
+        row = self._conn.execute(
+            f"SELECT resume_token FROM {RESUME_TOKEN_TABLE} WHERE table_name = ?", [self.table_name]
+        ).fetchone()
+        return json_util.loads(row[0]) if row else None
+
+    def _save_token(self, resume_token: Dict[str, Any]):
+        self._conn.execute(
+            f"INSERT OR REPLACE INTO {RESUME_TOKEN_TABLE} VALUES (?, ?, ?)",
+            [self.table_name, json_util.dumps(resume_token), datetime.now()]
+        )
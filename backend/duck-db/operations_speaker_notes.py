@@ -1,13 +1,15 @@
 from connection import DuckDBMongoDB
 from typing import List, Dict, Any, Optional
 import pandas as pd
-from datetime import datetime, timedelta
 import logging
 from config import Config, COLLECTIONS
-from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Columns returned for a note: the table is typed (see columnar.TABLE_SCHEMAS), so rows come back
+# with commands as a list and created_at/updated_at as datetimes, without any Python post-processing
+NOTE_COLUMNS = "id_note, title, content, COALESCE(commands, []) AS commands, schema_version, created_at, updated_at"
+
 class DatabaseSpeakerNotesOperations:
     def __init__(self, connection: DuckDBMongoDB):
         self.connection = connection
@@ -26,30 +28,14 @@ class DatabaseSpeakerNotesOperations:
 
             escaped_term = search_term.replace("'", "''")
             query = f"""
-            SELECT id_note, title, content, commands, schema_version, created_at, updated_at
+            SELECT {NOTE_COLUMNS}
             FROM {collection}
             WHERE (content IS NOT NULL AND LOWER(content) LIKE LOWER('%{escaped_term}%'))
             OR (title IS NOT NULL AND LOWER(title) LIKE LOWER('%{escaped_term}%'))
             ORDER BY created_at DESC
             LIMIT {limit}
             """
-            results = self.connection.query_duckdb(query)
-            # Convert commands from JSON string to list if needed
-            for note in results:
-                if isinstance(note.get("commands"), str):
-                    try:
-                        import json
-                        note["commands"] = json.loads(note["commands"])
-                    except Exception:
-                        note["commands"] = []
-                # Convert created_at/updated_at to datetime if string
-                for dt_field in ("created_at", "updated_at"):
-                    if note.get(dt_field) and isinstance(note[dt_field], str):
-                        try:
-                            note[dt_field] = datetime.fromisoformat(note[dt_field])
-                        except Exception:
-                            pass
-            return results
+            return self.connection.query_duckdb(query)
         except Exception as e:
             logger.error(f"Search failed for term '{search_term}': {e}")
             return []
@@ -66,36 +52,24 @@ class DatabaseSpeakerNotesOperations:
                 logger.info(f"No data found in {collection}")
                 return []
 
+            params = None
             if start_date and end_date:
+                # Bound as parameters and cast once, so the filter compares TIMESTAMPs, not strings
                 query = f"""
-                SELECT id_note, title, content, commands, schema_version, created_at, updated_at
+                SELECT {NOTE_COLUMNS}
                 FROM {collection}
-                WHERE created_at IS NOT NULL 
-                AND created_at BETWEEN '{start_date}' AND '{end_date}'
+                WHERE created_at BETWEEN CAST(? AS TIMESTAMP) AND CAST(? AS TIMESTAMP)
                 ORDER BY created_at DESC
                 """
+                params = [start_date, end_date]
             else:
                 query = f"""
-                SELECT id_note, title, content, commands, schema_version, created_at, updated_at
+                SELECT {NOTE_COLUMNS}
                 FROM {collection}
                 ORDER BY created_at DESC
                 """
 
-            results = self.connection.query_duckdb(query)
-            for note in results:
-                if isinstance(note.get("commands"), str):
-                    try:
-                        import json
-                        note["commands"] = json.loads(note["commands"])
-                    except Exception:
-                        note["commands"] = []
-                for dt_field in ("created_at", "updated_at"):
-                    if note.get(dt_field) and isinstance(note[dt_field], str):
-                        try:
-                            note[dt_field] = datetime.fromisoformat(note[dt_field])
-                        except Exception:
-                            pass
-            return results
+            return self.connection.query_duckdb(query, params)
         except Exception as e:
             logger.error(f"Date range query failed: {e}")
             return []
@@ -171,33 +145,19 @@ class DatabaseSpeakerNotesOperations:
                 logger.info(f"No data found in {collection}")
                 return []
             query = f"""
-            SELECT id_note, title, content, commands, schema_version, created_at, updated_at
+            SELECT {NOTE_COLUMNS}
             FROM {collection}
             WHERE created_at IS NOT NULL
             ORDER BY created_at DESC
             LIMIT {limit}
             """
-            results = self.connection.query_duckdb(query)
-            for note in results:
-                if isinstance(note.get("commands"), str):
-                    try:
-                        import json
-                        note["commands"] = json.loads(note["commands"])
-                    except Exception:
-                        note["commands"] = []
-                for dt_field in ("created_at", "updated_at"):
-                    if note.get(dt_field) and isinstance(note[dt_field], str):
-                        try:
-                            note[dt_field] = datetime.fromisoformat(note[dt_field])
-                        except Exception:
-                            pass
-            return results
+            return self.connection.query_duckdb(query)
         except Exception as e:
             logger.error(f"Recent speaker_notes query failed: {e}")
             return []
 
     # Export collection to pandas DataFrame for analysis
-    # It retrieves all notes and converts them to a DataFrame, handling commands and date fields
+    # It retrieves all notes as a DataFrame; commands and dates keep their DuckDB list and timestamp types
     def export_to_dataframe(self, collection: str = COLLECTIONS["SPEAKER_NOTES"]) -> Optional[pd.DataFrame]:
         """Export collection to pandas DataFrame for analysis"""
         try:
@@ -210,16 +170,8 @@ class DatabaseSpeakerNotesOperations:
                 logger.info(f"No data found in {collection}")
                 return pd.DataFrame()
             df = self.connection.duck_conn.execute(
-                f"SELECT id_note, title, content, commands, schema_version, created_at, updated_at FROM {collection}"
+                f"SELECT {NOTE_COLUMNS} FROM {collection}"
             ).df()
-            # Convert commands from JSON string to list if needed
-            if "commands" in df.columns:
-                import json
-                df["commands"] = df["commands"].apply(lambda x: json.loads(x) if isinstance(x, str) else x)
-            # Convert created_at/updated_at to datetime if string
-            for dt_field in ("created_at", "updated_at"):
-                if dt_field in df.columns:
-                    df[dt_field] = pd.to_datetime(df[dt_field], errors="coerce")
             return df
         except Exception as e:
             logger.error(f"DataFrame export failed: {e}")
@@ -0,0 +1,34 @@
+import logging
+import time
+from connection import DuckDBMongoDB
+from mirror import ChangeStreamMirror
+from config import DEFAULT_CONFIG, COLLECTIONS
+
+# Change streams need a replica set. A local single-node one is enough:
+#   docker run -d --name mongo-rs -p 27017:27017 mongo:7 --replSet rs0 --bind_ip_all
+#   docker exec mongo-rs mongosh --quiet --eval "rs.initiate()"
+#   MONGO_URI="mongodb://localhost:27017/?directConnection=true" python run_mirror.py
+# Then create, edit or delete notes through the API and watch the DuckDB counts follow.
+# Set DUCKDB_PATH to a file to resume from the stored tokens after a restart instead of resyncing.
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+REPORT_EVERY_SECONDS = 5
+
+if __name__ == "__main__":
+    db_connection = DuckDBMongoDB(mongo_uri=DEFAULT_CONFIG['mongo_uri'], db_name=DEFAULT_CONFIG['db_name'])
+    try:
+        db_connection.connect()
+        mirrors = [ChangeStreamMirror(db_connection, collection).start() for collection in COLLECTIONS.values()]
+        while True:
+            time.sleep(REPORT_EVERY_SECONDS)
+            for mirror in mirrors:
+                count = db_connection.query_duckdb(f"SELECT COUNT(*) as count FROM {mirror.table_name}")[0]['count']
+                print(f"📊 {mirror.table_name}: {count} rows in DuckDB, {mirror.applied_events} events applied")
+    except KeyboardInterrupt:
+        print("\n👋 Interrupted by user (Ctrl+C). Exiting gracefully.")
+    except Exception as e:
+        print(f"❌ Mirror failed: {e}")
+    finally:
+        db_connection.close()
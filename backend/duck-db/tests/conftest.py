@@ -0,0 +1,149 @@
+import copy
+import operator
+import os
+import sys
+import time
+from datetime import datetime
+
+import duckdb
+import pytest
+from bson import ObjectId
+
+# The duck-db modules import each other flat (from config import ...), like when run from this directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from connection import DuckDBMongoDB
+
+# Query operators used by the incremental sync
+OPERATORS = {"$gt": operator.gt, "$gte": operator.ge}
+
+def _matches(document, query) -> bool:
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(_matches(document, branch) for branch in condition):
+                return False
+            continue
+        value = document.get(key)
+        if isinstance(condition, dict):
+            if value is None or not all(OPERATORS[op](value, operand) for op, operand in condition.items()):
+                return False
+        elif value != condition:
+            return False
+    return True
+
+class FakeChangeStream:
+    """Change stream over FakeCollection.events; the resume token is the position in that list"""
+
+    def __init__(self, collection, position: int):
+        self.collection = collection
+        self.position = position
+        self.alive = True
+
+    @property
+    def resume_token(self):
+        return {"_data": str(self.position)}
+
+    def try_next(self):
+        if self.position < len(self.collection.events):
+            event = self.collection.events[self.position]
+            self.position += 1
+            return event
+        # The driver waits up to max_await_time_ms for a new event
+        time.sleep(0.01)
+        return None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.alive = False
+
+class FakeCollection:
+    """Just enough of a pymongo collection for the syncs and the mirror: find() with the filters they use,
+    a document count, and a change stream fed by insert/update/delete"""
+
+    def __init__(self, documents):
+        self.documents = documents
+        self.events = []
+        self.fetched = 0
+
+    def watch(self, full_document=None, resume_after=None, **kwargs):
+        return FakeChangeStream(self, int(resume_after["_data"]) if resume_after else len(self.events))
+
+    def insert(self, document):
+        self.documents.append(document)
+        self.events.append({"operationType": "insert", "documentKey": {"_id": document["_id"]}, "fullDocument": copy.deepcopy(document)})
+
+    def update(self, document_id, **fields):
+        document = next(document for document in self.documents if document["_id"] == document_id)
+        document.update(fields)
+        self.events.append({"operationType": "update", "documentKey": {"_id": document_id}, "fullDocument": copy.deepcopy(document)})
+
+    def delete(self, document_id):
+        self.documents[:] = [document for document in self.documents if document["_id"] != document_id]
+        self.events.append({"operationType": "delete", "documentKey": {"_id": document_id}})
+
+    def find(self, query=None, *args, **kwargs):
+        documents = [copy.deepcopy(document) for document in self.documents if _matches(document, query or {})]
+        self.fetched += len(documents)
+        return iter(documents)
+
+    def estimated_document_count(self):
+        return len(self.documents)
+
+@pytest.fixture
+def make_connection():
+    """DuckDBMongoDB on an in-memory DuckDB, reading collections from {name: [documents]}"""
+    connections = []
+
+    def factory(collections, batch_size: int = 2):
+        connection = DuckDBMongoDB(batch_size=batch_size, duckdb_path=":memory:")
+        connection.mongo_db = {name: FakeCollection(documents) for name, documents in collections.items()}
+        connection.duck_conn = duckdb.connect(":memory:")
+        connections.append(connection)
+        return connection
+
+    yield factory
+    for connection in connections:
+        connection.close()
+
+@pytest.fixture
+def make_note():
+    """SPEAKER_NOTES document as the API writes it"""
+    def factory(id_note: int, **fields):
+        now = datetime(2024, 5, 1, 12, 30)
+        document = {
+            "_id": ObjectId(),
+            "id_note": id_note,
+            "title": f"Note {id_note}",
+            "content": "texte",
+            "preview": "texte",
+            "commands": [],
+            "schema_version": "1.0.0",
+            "created_at": now,
+            "updated_at": now,
+        }
+        document.update(fields)
+        return document
+    return factory
+
+@pytest.fixture
+def make_command():
+    """COMMANDS document as the API writes it; override fields to build legacy ones"""
+    def factory(id_command: int, **fields):
+        now = datetime(2024, 5, 1, 12, 30)
+        document = {
+            "_id": ObjectId(),
+            "id_command": id_command,
+            "command_name": f"command_{id_command}",
+            "command_vocal": [f"commande {id_command}"],
+            "command_description": None,
+            "html_tag_start": "",
+            "html_tag_end": "",
+            "schema_version": "1.0.1",
+            "created_at": now,
+            "updated_at": now,
+        }
+        document.update(fields)
+        return document
+    return factory
@@ -0,0 +1,64 @@
+from datetime import datetime
+
+from bson import ObjectId
+
+from config import COLLECTIONS
+from columnar import decode_batch, get_table_schema
+from operations_speaker_notes import NOTE_COLUMNS
+
+class TestColumnar:
+    """Test class for the columnar decoding of MongoDB batches"""
+
+    def test_decode_batch_normalizes_list_columns(self, make_command):
+        """Test that a legacy string command_vocal is wrapped in a list, like the API migration, and a missing one stays NULL"""
+        schema = get_table_schema(COLLECTIONS["COMMANDS"])
+        legacy = make_command(2, command_vocal="ancienne", schema_version="1.0.0")
+        missing = make_command(3)
+        del missing["command_vocal"]
+
+        batch = decode_batch([make_command(1), legacy, missing], schema)
+
+        assert list(batch["command_vocal"]) == [["commande 1"], ["ancienne"], None]
+
+    def test_sync_legacy_string_command_vocal(self, make_connection, make_command):
+        """Test that a collection mixing legacy string and list command_vocal syncs in one pass"""
+        collection_name = COLLECTIONS["COMMANDS"]
+        documents = [
+            make_command(1),
+            make_command(2, command_vocal="ancienne", schema_version="1.0.0"),
+            make_command(3, command_vocal=None),
+        ]
+        connection = make_connection({collection_name: documents})
+
+        copied = connection.copy_collection(collection_name, collection_name)
+
+        assert copied == 3
+        rows = connection.duck_conn.execute(f"SELECT id_command, command_vocal FROM {collection_name} ORDER BY id_command").fetchall()
+        assert rows == [(1, ["commande 1"]), (2, ["ancienne"]), (3, None)]
+
+    def test_typed_schema_with_legacy_documents(self, make_connection, make_command):
+        """Test that both tables get their declared types, legacy list fields included, on copy and on upsert"""
+        now = datetime(2024, 5, 1, 12, 30)
+        notes = [
+            {"_id": ObjectId(), "id_note": 1, "title": "Note", "content": "texte", "commands": ["titre"], "schema_version": "1.0.0", "created_at": now, "updated_at": now},
+            # Written before commands existed, and by a client that sent a single command
+            {"_id": ObjectId(), "id_note": 2, "title": "Ancienne", "content": "texte", "created_at": now, "updated_at": now},
+            {"_id": ObjectId(), "id_note": 3, "title": "Seule", "content": "texte", "commands": "gras", "created_at": now, "updated_at": now},
+        ]
+        commands = [make_command(1), make_command(2, command_vocal="ancienne", schema_version="1.0.0")]
+        connection = make_connection({COLLECTIONS["SPEAKER_NOTES"]: notes, COLLECTIONS["COMMANDS"]: commands})
+
+        for collection_name in (COLLECTIONS["SPEAKER_NOTES"], COLLECTIONS["COMMANDS"]):
+            connection.copy_collection(collection_name, collection_name)
+            columns = dict(connection.duck_conn.execute(f"SELECT column_name, column_type FROM (DESCRIBE {collection_name})").fetchall())
+            assert columns == get_table_schema(collection_name)
+
+        # The mirror upserts single documents through the same path
+        connection.apply_changes(COLLECTIONS["COMMANDS"], [make_command(3, command_vocal="mirroir", schema_version="1.0.0")])
+
+        notes_rows = connection.duck_conn.execute(f"SELECT id_note, commands FROM {COLLECTIONS['SPEAKER_NOTES']} ORDER BY id_note").fetchall()
+        assert notes_rows == [(1, ["titre"]), (2, None), (3, ["gras"])]
+        # Readers coalesce the NULL back to an empty list
+        assert connection.query_duckdb(f"SELECT {NOTE_COLUMNS} FROM {COLLECTIONS['SPEAKER_NOTES']} WHERE id_note = 2")[0]["commands"] == []
+        command_rows = connection.duck_conn.execute(f"SELECT id_command, command_vocal FROM {COLLECTIONS['COMMANDS']} ORDER BY id_command").fetchall()
+        assert command_rows == [(1, ["commande 1"]), (2, ["ancienne"]), (3, ["mirroir"])]
@@ -0,0 +1,49 @@
+import pytest
+
+from config import COLLECTIONS
+
+NOTES = COLLECTIONS["SPEAKER_NOTES"]
+
+class TestCopyCollection:
+    """Test class for the batched full copy into a staging table"""
+
+    def test_copy_streams_in_batches(self, make_connection, make_note, monkeypatch, capsys):
+        """Test that a collection larger than batch_size is copied batch by batch, every document once"""
+        connection = make_connection({NOTES: [make_note(i) for i in range(5)]}, batch_size=2)
+        batch_sizes = []
+        write_batch = connection._write_batch
+
+        def recording_write_batch(conn, table_name, documents, *args, **kwargs):
+            batch_sizes.append(len(documents))
+            return write_batch(conn, table_name, documents, *args, **kwargs)
+
+        monkeypatch.setattr(connection, "_write_batch", recording_write_batch)
+
+        copied = connection.copy_collection(NOTES, NOTES)
+
+        assert copied == 5
+        assert batch_sizes == [2, 2, 1]
+        ids = [row[0] for row in connection.duck_conn.execute(f"SELECT id_note FROM {NOTES} ORDER BY id_note").fetchall()]
+        assert ids == [0, 1, 2, 3, 4]
+        # The final progress line reports the whole copy
+        assert f"📦 {NOTES}: 5/5 documents" in capsys.readouterr().out
+
+    def test_failed_copy_keeps_the_existing_table(self, make_connection, make_note, monkeypatch):
+        """Test that a copy failing mid-way leaves the previous table and watermark untouched"""
+        connection = make_connection({NOTES: [make_note(i) for i in range(3)]}, batch_size=2)
+        connection.copy_collection(NOTES, NOTES)
+        watermark = connection._get_watermark(NOTES)
+        collection = connection.get_mongo_collection(NOTES)
+
+        def failing_cursor(*args, **kwargs):
+            yield from (make_note(10 + i) for i in range(3))
+            raise RuntimeError("cursor killed")
+
+        monkeypatch.setattr(collection, "find", failing_cursor)
+
+        with pytest.raises(RuntimeError):
+            connection.copy_collection(NOTES, NOTES)
+
+        ids = [row[0] for row in connection.duck_conn.execute(f"SELECT id_note FROM {NOTES} ORDER BY id_note").fetchall()]
+        assert ids == [0, 1, 2]
+        assert connection._get_watermark(NOTES) == watermark
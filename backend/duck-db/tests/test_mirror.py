@@ -0,0 +1,98 @@
+import time
+
+from config import COLLECTIONS
+from mirror import ChangeStreamMirror
+
+NOTES = COLLECTIONS["SPEAKER_NOTES"]
+
+def wait_for(condition, timeout: float = 5.0):
+    """Poll condition() until it is true, failing after timeout seconds"""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out waiting for the mirror"
+        time.sleep(0.02)
+
+def note_ids(connection):
+    return [row[0] for row in connection.duck_conn.execute(f"SELECT id_note FROM {NOTES} ORDER BY id_note").fetchall()]
+
+class TestChangeStreamMirror:
+    """Test class for the change stream mirror, driven by a fake change stream"""
+
+    def test_failed_batch_is_replayed(self, make_connection, make_note, monkeypatch):
+        """Test that a batch whose DuckDB write failed is replayed from the previous token"""
+        connection = make_connection({NOTES: []})
+        collection = connection.get_mongo_collection(NOTES)
+        apply_changes = connection.apply_changes
+        failures = []
+
+        def apply_changes_failing_once(*args, **kwargs):
+            if not failures:
+                failures.append(True)
+                raise RuntimeError("transient DuckDB failure")
+            return apply_changes(*args, **kwargs)
+
+        monkeypatch.setattr(connection, "apply_changes", apply_changes_failing_once)
+        mirror = ChangeStreamMirror(connection, NOTES, flush_seconds=0.05).start()
+        for id_note in range(3):
+            collection.insert(make_note(id_note))
+
+        wait_for(lambda: note_ids(connection) == [0, 1, 2])
+        assert failures
+        mirror.stop()
+
+    def test_apply_coalesces_events_per_document(self, make_connection, make_note):
+        """Test that a batch keeps the last state of each document and stores its token with it"""
+        connection = make_connection({NOTES: [make_note(0), make_note(1)]})
+        connection.copy_collection(NOTES, NOTES)
+        collection = connection.get_mongo_collection(NOTES)
+        first, second = collection.documents
+        inserted, inserted_then_deleted = make_note(2), make_note(3)
+        collection.insert(inserted)
+        collection.update(inserted["_id"], title="Insérée puis modifiée")
+        collection.insert(inserted_then_deleted)
+        collection.delete(inserted_then_deleted["_id"])
+        collection.delete(first["_id"])
+        collection.update(second["_id"], title="Modifiée")
+
+        mirror = ChangeStreamMirror(connection, NOTES)
+        mirror._conn = connection.duck_conn.cursor()
+        mirror._ensure_token_table()
+        mirror._apply(collection.events, {"_data": "6"})
+
+        rows = connection.duck_conn.execute(f"SELECT id_note, title FROM {NOTES} ORDER BY id_note").fetchall()
+        assert rows == [(1, "Modifiée"), (2, "Insérée puis modifiée")]
+        assert mirror._load_token() == {"_data": "6"}
+        assert mirror.applied_events == 6
+
+    def test_restart_resumes_from_stored_token(self, make_connection, make_note):
+        """Test that a restarted mirror replays what was written while it was down, without a full sync"""
+        connection = make_connection({NOTES: [make_note(0)]})
+        collection = connection.get_mongo_collection(NOTES)
+        mirror = ChangeStreamMirror(connection, NOTES, flush_seconds=0.05).start()
+        collection.insert(make_note(1))
+        wait_for(lambda: note_ids(connection) == [0, 1])
+        mirror.stop()
+
+        collection.insert(make_note(2))
+        fetched = collection.fetched
+        mirror = ChangeStreamMirror(connection, NOTES, flush_seconds=0.05).start()
+
+        wait_for(lambda: note_ids(connection) == [0, 1, 2])
+        assert collection.fetched == fetched
+        mirror.stop()
+
+    def test_invalidating_event_triggers_resync(self, make_connection, make_note):
+        """Test that an invalidate event rebuilds the table from the collection and resumes after it"""
+        connection = make_connection({NOTES: [make_note(0)]})
+        collection = connection.get_mongo_collection(NOTES)
+        mirror = ChangeStreamMirror(connection, NOTES, flush_seconds=0.05).start()
+        wait_for(lambda: note_ids(connection) == [0])
+
+        # The collection was dropped and refilled: the stream ends with an invalidate event
+        collection.documents[:] = [make_note(5), make_note(6)]
+        collection.events.append({"operationType": "invalidate"})
+        wait_for(lambda: note_ids(connection) == [5, 6])
+
+        collection.insert(make_note(7))
+        wait_for(lambda: note_ids(connection) == [5, 6, 7])
+        mirror.stop()
@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta
+
+from config import COLLECTIONS, Config
+
+NOTES = COLLECTIONS["SPEAKER_NOTES"]
+
+class TestIncrementalSync:
+    """Test class for the watermark-based incremental sync"""
+
+    def _synced(self, make_connection, make_note):
+        notes = [make_note(i, updated_at=datetime(2024, 5, 1, 12, i)) for i in range(3)]
+        connection = make_connection({NOTES: notes})
+        connection.sync_mongo_to_duckdb(NOTES)
+        return connection, notes
+
+    def _rows(self, connection):
+        return connection.duck_conn.execute(f"SELECT id_note, title FROM {NOTES} ORDER BY id_note").fetchall()
+
+    def test_changed_document_is_upserted(self, make_connection, make_note):
+        """Test that an edited document replaces its row"""
+        connection, notes = self._synced(make_connection, make_note)
+        notes[1].update(title="Modifiée", updated_at=datetime(2024, 5, 1, 13, 0))
+
+        connection.sync_mongo_to_duckdb(NOTES)
+
+        assert self._rows(connection) == [(0, "Note 0"), (1, "Modifiée"), (2, "Note 2")]
+        assert connection._get_watermark(NOTES)["updated_at"] == datetime(2024, 5, 1, 13, 0)
+
+    def test_new_id_is_picked_up(self, make_connection, make_note):
+        """Test that an insert without updated_at is caught by its _id"""
+        connection, notes = self._synced(make_connection, make_note)
+        notes.append(make_note(3, updated_at=None))
+
+        connection.sync_mongo_to_duckdb(NOTES)
+
+        assert self._rows(connection)[-1] == (3, "Note 3")
+        assert connection._get_watermark(NOTES)["last_id"] == str(notes[-1]["_id"])
+
+    def test_sync_without_changes_is_a_no_op(self, make_connection, make_note):
+        """Test that a sync with nothing new leaves the rows and the watermark as they were"""
+        connection, _ = self._synced(make_connection, make_note)
+        rows, watermark = self._rows(connection), connection._get_watermark(NOTES)
+
+        connection.sync_mongo_to_duckdb(NOTES)
+
+        assert self._rows(connection) == rows
+        assert connection._get_watermark(NOTES) == watermark
+
+    def test_late_commit_below_the_watermark_is_picked_up(self, make_connection, make_note):
+        """Test that a write stamped before the watermark but committed after the last read is synced"""
+        connection, notes = self._synced(make_connection, make_note)
+        watermark = connection._get_watermark(NOTES)["updated_at"]
+        notes[0].update(title="En retard", updated_at=watermark - timedelta(seconds=Config.SYNC_LOOKBACK_SECONDS / 2))
+
+        connection.sync_mongo_to_duckdb(NOTES)
+
+        assert self._rows(connection)[0] == (0, "En retard")
+        assert connection._get_watermark(NOTES)["updated_at"] == watermark
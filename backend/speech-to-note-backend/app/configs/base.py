@@ -1,16 +1,50 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Literal, Optional
 
 class BaseConfig(BaseSettings):
     """Base configuration class"""
     MONGO_URI: str
     DATABASE_NAME: str
     ENVIRONMENT: str
-    COLLECTIONS: list[str] = ["SPEAKER_NOTES", "COMMANDS"]
+    COLLECTIONS: list[str] = ["SPEAKER_NOTES", "COMMANDS", "COUNTERS", "MIGRATIONS"]
     CURRENT_APPLICATION_VERSION: str = "2.1.0"
     CURRENT_SC_SCHEMA_VERSION: str = "1.0.1"
     CURRENT_SN_SCHEMA_VERSION: str = "1.0.0"
     DEBUG: bool = False
+    RECONCILE_INDEXES_ON_STARTUP: bool = True
+    MAX_INSERT_BATCH_SIZE: int = 1000
+    BULK_INSERT_ORDERED: bool = True
+    DEFAULT_PAGE_SIZE: int = 50
+    MAX_PAGE_SIZE: int = 500
+    NOTE_PREVIEW_LENGTH: int = 200
+    STREAM_BATCH_SIZE: int = 500
+    # MongoDB connection pool (per worker process)
+    MONGO_MAX_POOL_SIZE: int = 100
+    MONGO_MIN_POOL_SIZE: int = 10
+    MONGO_CONNECT_TIMEOUT_MS: int = 5000
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = 5000
+    MONGO_WAIT_QUEUE_TIMEOUT_MS: Optional[int] = 2000  # None = wait for a free connection forever
+    MONGO_WARM_UP_POOL: bool = True
+    # Migrations (python -m app.migrate). RUN_MIGRATIONS_ON_STARTUP defaults per CURRENT_ENV, see config.py
+    RUN_MIGRATIONS_ON_STARTUP: Optional[bool] = None
+    REQUIRE_CURRENT_SCHEMA: bool = False  # refuse to start when the schema is behind
+    MIGRATION_LOCK_TTL_SECONDS: float = 60.0
+    MIGRATION_BATCH_SIZE: int = 1000
+    MIGRATION_BATCH_SLEEP_SECONDS: float = 0.05
+    # Upgrade old documents when they are read and write them back in the background
+    LAZY_SCHEMA_UPGRADE: bool = True
+    LAZY_UPGRADE_BATCH_SIZE: int = 500
+    LAZY_UPGRADE_FLUSH_SECONDS: float = 1.0
+    # Server (python -m app.serve). SERVER_MODE defaults per CURRENT_ENV, see config.py
+    SERVER_MODE: Optional[Literal["dev", "production"]] = None
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: Optional[int] = None  # None = derived from the container CPU quota
+    SERVER_KEEP_ALIVE_SECONDS: int = 75
+    SERVER_BACKLOG: int = 2048
+    SERVER_ACCESS_LOG: bool = False
+    # Trust X-Forwarded-For/-Proto only from these addresses (e.g. the ingress CIDR); None = ignore them
+    SERVER_FORWARDED_ALLOW_IPS: Optional[str] = None
     
     class Config:
         env_file = ".env"
@@ -4,6 +4,20 @@ from .docker import DockerConfig
 from .kubernetes import KubernetesConfig
 from .base import BaseConfig
 
+# Default server mode for each CURRENT_ENV (dev = single reloading worker)
+SERVER_MODES = {
+    "local": "dev",
+    "docker": "production",
+    "kubernetes": "production"
+}
+
+# Whether the API runs migrations itself; on Kubernetes the migrate init container does it
+MIGRATIONS_ON_STARTUP = {
+    "local": True,
+    "docker": True,
+    "kubernetes": False
+}
+
 def get_config():
     """Factory function to return the appropriate configuration"""
     current_env = os.getenv("CURRENT_ENV", "local").lower()
@@ -15,7 +29,12 @@ def get_config():
     }
     
     config_class = config_map.get(current_env, LocalConfig)
-    return config_class()
+    env_config = config_class()
+    if env_config.SERVER_MODE is None:
+        env_config.SERVER_MODE = SERVER_MODES.get(current_env, "dev")
+    if env_config.RUN_MIGRATIONS_ON_STARTUP is None:
+        env_config.RUN_MIGRATIONS_ON_STARTUP = MIGRATIONS_ON_STARTUP.get(current_env, True)
+    return env_config
 
 # Global config instance
 config: BaseConfig = get_config()
@@ -0,0 +1,36 @@
+from pymongo import ASCENDING, DESCENDING
+
+# Declarative index registry, keyed like config.COLLECTIONS.
+# Names follow MongoDB's default "<field>_<direction>" convention.
+INDEXES = {
+    "SPEAKER_NOTES": [
+        {"name": "id_note_1", "keys": [("id_note", ASCENDING)], "unique": True},
+        {"name": "created_at_-1", "keys": [("created_at", DESCENDING)]},
+        # Keyset pagination order (updated_at, id_note)
+        {"name": "updated_at_-1_id_note_-1", "keys": [("updated_at", DESCENDING), ("id_note", DESCENDING)]},
+        # Migrations select and group documents by source schema_version
+        {"name": "schema_version_1", "keys": [("schema_version", ASCENDING)]},
+    ],
+    "COMMANDS": [
+        {"name": "id_command_1", "keys": [("id_command", ASCENDING)], "unique": True},
+        {"name": "created_at_-1", "keys": [("created_at", DESCENDING)]},
+        # Keyset pagination order (updated_at, id_command)
+        {"name": "updated_at_-1_id_command_-1", "keys": [("updated_at", DESCENDING), ("id_command", DESCENDING)]},
+        # command_vocal is an array, so this is a multikey index
+        {"name": "command_vocal_1", "keys": [("command_vocal", ASCENDING)]},
+        {"name": "schema_version_1", "keys": [("schema_version", ASCENDING)]},
+    ],
+}
+
+# Hot query shapes that must be answered by an index scan
+HOT_QUERIES = {
+    "SPEAKER_NOTES": [
+        {"id_note": 1},
+        {"id_note": {"$in": [1, 2]}},
+    ],
+    "COMMANDS": [
+        {"id_command": 1},
+        {"id_command": {"$in": [1, 2]}},
+        {"command_vocal": "titre"},
+    ],
+}
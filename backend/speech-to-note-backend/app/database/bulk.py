@@ -0,0 +1,45 @@
+from typing import Any, Dict, List, Tuple
+
+from pymongo import UpdateOne
+
+from ..configs.config import config
+from .queries import find_shaped
+
+async def insert_documents(collection, documents: List[Dict[str, Any]], chunk_size: int = None, ordered: bool = None) -> List[Dict[str, Any]]:
+    """Insert documents with insert_many, chunked to at most chunk_size documents per round trip"""
+    chunk_size = chunk_size or config.MAX_INSERT_BATCH_SIZE
+    ordered = config.BULK_INSERT_ORDERED if ordered is None else ordered
+
+    for start in range(0, len(documents), chunk_size):
+        await collection.insert_many(documents[start:start + chunk_size], ordered=ordered)
+
+    # insert_many sets the generated ObjectId on each document
+    for document in documents:
+        document["_id"] = str(document["_id"])
+    return documents
+
+async def update_documents(collection, collection_name: str, id_field: str, updates: List[Tuple[int, Dict[str, Any]]]) -> Tuple[List[Dict[str, Any]], List[int]]:
+    """Apply $set updates in a single round trip and fetch the post-images.
+
+    Single updates take the same path: the post-images come from find_shaped,
+    so they are shaped like every other read (string _id, preview fallback).
+    Returns the updated documents (in request order) and the ids that matched nothing.
+    """
+    # Ordered so that repeated ids in one autosave batch are applied in request order
+    await collection.bulk_write(
+        [UpdateOne({id_field: id_value}, {"$set": update_data}) for id_value, update_data in updates],
+        ordered=True
+    )
+
+    requested_ids = list(dict.fromkeys(id_value for id_value, _ in updates))
+    updated_docs = await find_shaped(collection, collection_name, match={id_field: {"$in": requested_ids}})
+    docs_by_id = {doc[id_field]: doc for doc in updated_docs}
+
+    found_docs, not_found_ids = [], []
+    for id_value in requested_ids:
+        doc = docs_by_id.get(id_value)
+        if doc is None:
+            not_found_ids.append(id_value)
+            continue
+        found_docs.append(doc)
+    return found_docs, not_found_ids
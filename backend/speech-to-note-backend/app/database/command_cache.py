@@ -0,0 +1,64 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from .queries import find_shaped
+from .versions import bump_version, get_version
+
+class CommandCache:
+    """In-process cache of the full speaker command list.
+
+    The cache is keyed by the command-set version stored in COUNTERS: every
+    read checks that version (one COUNTERS lookup, the one the ETag is built
+    from) and only reloads the list when it changed. Writes made by this worker
+    invalidate it immediately, writes made by other workers on the next read.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        """Drop the cached list and reset statistics"""
+        self._commands: Optional[List[Dict[str, Any]]] = None
+        self._version: Optional[int] = None
+        # Bumped by invalidate(), so a load that raced a write is not cached
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def version(self) -> Optional[int]:
+        return self._version
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "version": self._version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+        }
+
+    async def get(self, collection, counters, version: Optional[int] = None) -> Tuple[List[Dict[str, Any]], int]:
+        """Return the command list and its version, loading it from Mongo on a miss.
+
+        version is the command-set version just read from COUNTERS (e.g. the one
+        an ETag was built from); it is read here when not given.
+        """
+        if version is None:
+            version = await get_version(counters, "COMMANDS")
+        if self._commands is not None and version == self._version:
+            self.hits += 1
+            return self._commands, self._version
+
+        self.misses += 1
+        generation = self._generation
+        commands = await find_shaped(collection, "COMMANDS")
+        if generation == self._generation:
+            self._commands, self._version = commands, version
+        return commands, version
+
+    async def invalidate(self, counters) -> int:
+        """Write-through invalidation: bump the shared version and drop the local copy"""
+        self._generation += 1
+        self._commands = None
+        self._version = await bump_version(counters, "COMMANDS")
+        return self._version
@@ -0,0 +1,129 @@
+import argparse
+import asyncio
+from typing import Any, Dict, List
+
+from pymongo import AsyncMongoClient, IndexModel
+
+from ..configs.config import config
+from ..configs.indexes import INDEXES, HOT_QUERIES
+from .locks import DistributedLock
+
+def _same_spec(existing: Dict[str, Any], wanted: Dict[str, Any]) -> bool:
+    """Compare an index_information() entry with a registry entry"""
+    existing_keys = [(field, direction) for field, direction in existing.get("key", [])]
+    return existing_keys == list(wanted["keys"]) and bool(existing.get("unique", False)) == bool(wanted.get("unique", False))
+
+async def reconcile_collection_indexes(collection, wanted_indexes: List[Dict[str, Any]], drop_unknown: bool = False, dry_run: bool = False) -> Dict[str, List[str]]:
+    """Create missing indexes so the collection matches the registry.
+
+    Nothing is dropped unless drop_unknown is set: then indexes missing from the
+    registry are dropped and changed definitions rebuilt. Otherwise a changed
+    definition is only reported as outdated. Dropping is an explicit operator
+    action (python -m app.database.indexes --drop-unknown), never run at startup.
+    """
+    existing = await collection.index_information()
+    wanted_by_name = {index["name"]: index for index in wanted_indexes}
+    diff = {"created": [], "dropped": [], "unchanged": [], "outdated": []}
+
+    # Drop indexes that are unknown or whose definition changed (never the mandatory _id index)
+    for name, info in existing.items():
+        if name == "_id_":
+            continue
+        wanted = wanted_by_name.get(name)
+        if wanted is not None and _same_spec(info, wanted):
+            diff["unchanged"].append(name)
+            continue
+        if not drop_unknown:
+            if wanted is not None:
+                diff["outdated"].append(name)
+            continue
+        if not dry_run:
+            await collection.drop_index(name)
+        diff["dropped"].append(name)
+
+    to_create = [index for name, index in wanted_by_name.items() if name not in diff["unchanged"] and name not in diff["outdated"]]
+    if to_create and not dry_run:
+        await collection.create_indexes([
+            IndexModel(index["keys"], name=index["name"], unique=index.get("unique", False), background=True)
+            for index in to_create
+        ])
+    diff["created"] = [index["name"] for index in to_create]
+    return diff
+
+def _plan_uses_index(plan: Any) -> bool:
+    """Walk an explain() plan tree looking for an index scan stage"""
+    if isinstance(plan, dict):
+        if "IXSCAN" in str(plan.get("stage", "")):
+            return True
+        return any(_plan_uses_index(value) for value in plan.values())
+    if isinstance(plan, list):
+        return any(_plan_uses_index(item) for item in plan)
+    return False
+
+async def verify_hot_queries(collections: Dict[str, Any], hot_queries: Dict[str, List[Dict[str, Any]]] = HOT_QUERIES) -> List[str]:
+    """Explain every hot query and return the ones that are not using an index
+
+    collections maps logical names (SPEAKER_NOTES, COMMANDS...) to the resolved
+    collections, e.g. app.state.collections, so *_TEST collections are checked too.
+    """
+    collection_scans = []
+    for collection_name, filters in hot_queries.items():
+        for query_filter in filters:
+            explain = await collections[collection_name].find(query_filter).explain()
+            if not _plan_uses_index(explain.get("queryPlanner", {}).get("winningPlan", {})):
+                collection_scans.append(f"{collection_name} {query_filter}")
+    return collection_scans
+
+async def reconcile_indexes(collections: Dict[str, Any], registry: Dict[str, List[Dict[str, Any]]] = INDEXES, drop_unknown: bool = False, dry_run: bool = False) -> Dict[str, Dict[str, List[str]]]:
+    """Reconcile every registered collection and log the resulting diff
+
+    collections maps logical names to the resolved collections (see verify_hot_queries).
+    """
+    report = {}
+    for collection_name, wanted_indexes in registry.items():
+        diff = await reconcile_collection_indexes(collections[collection_name], wanted_indexes, drop_unknown, dry_run)
+        report[collection_name] = diff
+        if diff["created"] or diff["dropped"]:
+            print(f"[INDEXES] {collection_name}: created {diff['created']}, dropped {diff['dropped']}", flush=True)
+        else:
+            print(f"[INDEXES] {collection_name}: up to date ({len(diff['unchanged'])} indexes)", flush=True)
+        if diff["outdated"]:
+            print(f"[INDEXES] ⚠️ {collection_name}: {diff['outdated']} differ from the registry, run python -m app.database.indexes --drop-unknown", flush=True)
+
+    if not dry_run:
+        collection_scans = await verify_hot_queries(collections)
+        for query in collection_scans:
+            print(f"[INDEXES] ⚠️ Hot query is not index-backed: {query}", flush=True)
+        if not collection_scans:
+            print("[INDEXES] ✅ All hot queries use an index scan", flush=True)
+    return report
+
+# Lock held while dropping, so two operators (or jobs) never race each other's drop/create calls
+LOCK_NAME = "indexes"
+
+async def _main(drop_unknown: bool, dry_run: bool):
+    client = AsyncMongoClient(config.MONGO_URI)
+    try:
+        database = client[config.DATABASE_NAME]
+        collections = {collection_name: database[collection_name] for collection_name in config.COLLECTIONS}
+        if not drop_unknown or dry_run:
+            await reconcile_indexes(collections, drop_unknown=drop_unknown, dry_run=dry_run)
+            return
+        lock = DistributedLock(collections["MIGRATIONS"], LOCK_NAME, ttl_seconds=config.MIGRATION_LOCK_TTL_SECONDS)
+        await lock.acquire()
+        try:
+            await reconcile_indexes(collections, drop_unknown=True)
+        finally:
+            await lock.release()
+    finally:
+        await client.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconcile MongoDB indexes with the index registry")
+    parser.add_argument("--dry-run", action="store_true", help="Only print the diff, do not change anything")
+    drop_mode = parser.add_mutually_exclusive_group()
+    drop_mode.add_argument("--keep-unknown", dest="drop_unknown", action="store_false", help="Only create missing indexes (default)")
+    drop_mode.add_argument("--drop-unknown", dest="drop_unknown", action="store_true", help="Also drop indexes missing from the registry and rebuild changed ones, under a lock")
+    parser.set_defaults(drop_unknown=False)
+    args = parser.parse_args()
+    asyncio.run(_main(drop_unknown=args.drop_unknown, dry_run=args.dry_run))
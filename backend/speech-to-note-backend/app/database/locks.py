@@ -0,0 +1,97 @@
+import asyncio
+import os
+import socket
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from pymongo.errors import DuplicateKeyError
+
+class LockLostError(Exception):
+    """Raised by DistributedLock.ensure_held once the lease could not be renewed"""
+
+def default_owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+class DistributedLock:
+    """Lease-based lock stored as one document ({_id: name, owner, expires_at}).
+
+    Acquiring is a single conditional upsert: it matches only a free or expired
+    lock, so a concurrent holder makes the upsert collide on _id. While held, a
+    background task renews the lease every ttl/3 so a crashed holder frees the
+    lock after at most `ttl_seconds`. If renewal fails until the lease runs out,
+    or another owner took the lock over, `lost` is set: long-running holders
+    call ensure_held() between units of work and stop.
+    """
+
+    def __init__(self, collection, name: str, owner: Optional[str] = None, ttl_seconds: float = 60.0):
+        self.collection = collection
+        self.name = name
+        self.owner = owner or default_owner()
+        self.ttl_seconds = ttl_seconds
+        self._heartbeat: Optional[asyncio.Task] = None
+        self._lease_until: Optional[datetime] = None
+        self.lost = False
+
+    def _expires_at(self) -> datetime:
+        return datetime.now(timezone.utc) + timedelta(seconds=self.ttl_seconds)
+
+    async def try_acquire(self) -> bool:
+        now = datetime.now(timezone.utc)
+        try:
+            await self.collection.update_one(
+                {"_id": self.name, "$or": [{"owner": None}, {"owner": self.owner}, {"expires_at": {"$lt": now}}]},
+                {"$set": {"owner": self.owner, "acquired_at": now, "expires_at": self._expires_at()}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            return False
+        self._lease_until, self.lost = self._expires_at(), False
+        self._heartbeat = asyncio.create_task(self._renew())
+        return True
+
+    async def acquire(self, wait: bool = True, poll_seconds: float = 2.0) -> bool:
+        """Take the lock, polling until it is free when `wait` is set"""
+        while not await self.try_acquire():
+            if not wait:
+                return False
+            holder = await self.collection.find_one({"_id": self.name})
+            print(f"[LOCK] ⏳ {self.name} held by {holder and holder.get('owner')}, waiting...", flush=True)
+            await asyncio.sleep(poll_seconds)
+        return True
+
+    async def _renew(self):
+        while True:
+            await asyncio.sleep(self.ttl_seconds / 3)
+            expires_at = self._expires_at()
+            try:
+                result = await self.collection.update_one(
+                    {"_id": self.name, "owner": self.owner},
+                    {"$set": {"expires_at": expires_at}}
+                )
+            except Exception as e:
+                # Keep retrying while the current lease still covers us
+                print(f"[LOCK] ⚠️ Failed to renew {self.name}: {e}", flush=True)
+                if datetime.now(timezone.utc) < self._lease_until:
+                    continue
+                print(f"[LOCK] ❌ Lease on {self.name} expired, giving it up", flush=True)
+                self.lost = True
+                return
+            if not result.matched_count:
+                print(f"[LOCK] ❌ {self.name} was taken over by another owner", flush=True)
+                self.lost = True
+                return
+            self._lease_until = expires_at
+
+    def ensure_held(self):
+        """Raise LockLostError when the lease was lost since it was acquired"""
+        if self.lost:
+            raise LockLostError(f"Lock {self.name} is no longer held by {self.owner}")
+
+    async def release(self):
+        if self._heartbeat:
+            self._heartbeat.cancel()
+            self._heartbeat = None
+        await self.collection.update_one(
+            {"_id": self.name, "owner": self.owner},
+            {"$set": {"owner": None, "expires_at": None}}
+        )
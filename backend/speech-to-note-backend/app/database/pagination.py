@@ -0,0 +1,70 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import ASCENDING, DESCENDING
+
+from .queries import find_shaped
+
+def encode_cursor(doc: Dict[str, Any], id_field: str) -> str:
+    """Build an opaque cursor pointing just after doc in (updated_at, id) order.
+
+    doc must be the stored document: legacy documents without updated_at keep a
+    null position (MongoDB sorts them as null), even if they are served upgraded.
+    """
+    updated_at = doc.get("updated_at")
+    payload = {"u": updated_at.isoformat() if updated_at is not None else None, "i": doc[id_field]}
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], int]:
+    """Decode a cursor produced by encode_cursor, raising ValueError if it is malformed"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        updated_at = datetime.fromisoformat(payload["u"]) if payload["u"] is not None else None
+        return updated_at, int(payload["i"])
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+def keyset_filter(id_field: str, after: Optional[str], sort: str = "desc") -> Dict[str, Any]:
+    """Mongo filter selecting documents strictly after the cursor position.
+
+    Documents without updated_at sort as null, i.e. below every date: they form
+    their own segment, last in desc order and first in asc order.
+    """
+    if not after:
+        return {}
+    updated_at, id_value = decode_cursor(after)
+    op = "$lt" if sort == "desc" else "$gt"
+    if updated_at is None:
+        same_segment = {"updated_at": None, id_field: {op: id_value}}
+        return same_segment if sort == "desc" else {"$or": [same_segment, {"updated_at": {"$ne": None}}]}
+    branches = [
+        {"updated_at": {op: updated_at}},
+        {"updated_at": updated_at, id_field: {op: id_value}}
+    ]
+    if sort == "desc":
+        branches.append({"updated_at": None})
+    return {"$or": branches}
+
+def keyset_sort(id_field: str, sort: str = "desc") -> List[Tuple[str, int]]:
+    """Sort matching the (updated_at, id) compound index"""
+    direction = DESCENDING if sort == "desc" else ASCENDING
+    return [("updated_at", direction), (id_field, direction)]
+
+async def find_page(collection, collection_name: str, id_field: str, limit: int, after: Optional[str] = None, sort: str = "desc", projection: Optional[Dict[str, Any]] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Fetch one page of API-shaped documents in keyset order, with the cursor of the next page"""
+    docs = await find_shaped(
+        collection,
+        collection_name,
+        match=keyset_filter(id_field, after, sort),
+        sort=keyset_sort(id_field, sort),
+        limit=limit + 1,
+        projection=projection
+    )
+
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor(docs[-1], id_field)
+    return docs, next_cursor
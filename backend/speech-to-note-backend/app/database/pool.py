@@ -0,0 +1,134 @@
+import asyncio
+from collections import deque
+from typing import Any, Dict, List
+
+from pymongo import AsyncMongoClient
+from pymongo.monitoring import (
+    ConnectionCheckOutFailedReason,
+    ConnectionPoolListener,
+)
+
+from ..configs.config import config
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+class PoolMetrics(ConnectionPoolListener):
+    """Connection pool gauges and checkout wait times for one MongoClient.
+
+    The driver publishes pool events synchronously, so plain counters are
+    enough. Wait times come from the duration carried by checked-out and
+    check-out-failed events.
+    """
+
+    def __init__(self, sample_size: int = 1000):
+        self.open = 0
+        self.in_use = 0
+        self.max_in_use = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.checkout_timeouts = 0
+        self.pool_clears = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self._recent_waits = deque(maxlen=sample_size)
+
+    def _record_wait(self, duration):
+        if duration is None:
+            return
+        self.wait_seconds_total += duration
+        self.wait_seconds_max = max(self.wait_seconds_max, duration)
+        self._recent_waits.append(duration)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self.pool_clears += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self.open += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self.open = max(0, self.open - 1)
+
+    def connection_check_out_started(self, event):
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+
+    def connection_check_out_failed(self, event):
+        self.waiting = max(0, self.waiting - 1)
+        self.checkout_failures += 1
+        if event.reason == ConnectionCheckOutFailedReason.TIMEOUT:
+            self.checkout_timeouts += 1
+        self._record_wait(event.duration)
+
+    def connection_checked_out(self, event):
+        self.waiting = max(0, self.waiting - 1)
+        self.in_use += 1
+        self.max_in_use = max(self.max_in_use, self.in_use)
+        self.checkouts += 1
+        self._record_wait(event.duration)
+
+    def connection_checked_in(self, event):
+        self.in_use = max(0, self.in_use - 1)
+
+    def snapshot(self) -> Dict[str, Any]:
+        recent = list(self._recent_waits)
+        completed = self.checkouts + self.checkout_failures
+        return {
+            "open": self.open,
+            "in_use": self.in_use,
+            "max_in_use": self.max_in_use,
+            "waiting": self.waiting,
+            "max_waiting": self.max_waiting,
+            "checkouts": self.checkouts,
+            "checkout_failures": self.checkout_failures,
+            "checkout_timeouts": self.checkout_timeouts,
+            "pool_clears": self.pool_clears,
+            "wait_ms_mean": round(self.wait_seconds_total / completed * 1000, 3) if completed else 0.0,
+            "wait_ms_max": round(self.wait_seconds_max * 1000, 3),
+            "wait_ms_p50": round(_percentile(recent, 50) * 1000, 3),
+            "wait_ms_p99": round(_percentile(recent, 99) * 1000, 3),
+        }
+
+    def prometheus(self) -> str:
+        """Prometheus text exposition of the snapshot"""
+        snapshot = self.snapshot()
+        gauges = {"open", "in_use", "max_in_use", "waiting", "max_waiting", "wait_ms_mean", "wait_ms_max", "wait_ms_p50", "wait_ms_p99"}
+        lines = []
+        for name, value in snapshot.items():
+            metric = f"mongo_pool_{name}" if name in gauges else f"mongo_pool_{name}_total"
+            lines.append(f"# TYPE {metric} {'gauge' if name in gauges else 'counter'}")
+            lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+def create_client(pool_metrics: PoolMetrics) -> AsyncMongoClient:
+    """AsyncMongoClient with the configured pool bounds and timeouts"""
+    return AsyncMongoClient(
+        config.MONGO_URI,
+        maxPoolSize=config.MONGO_MAX_POOL_SIZE,
+        minPoolSize=config.MONGO_MIN_POOL_SIZE,
+        connectTimeoutMS=config.MONGO_CONNECT_TIMEOUT_MS,
+        serverSelectionTimeoutMS=config.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        waitQueueTimeoutMS=config.MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        event_listeners=[pool_metrics]
+    )
+
+async def warm_up_pool(client: AsyncMongoClient, size: int):
+    """Open `size` connections up front: concurrent pings each check out their own connection"""
+    await asyncio.gather(*(client.admin.command("ping") for _ in range(size)))
@@ -0,0 +1,35 @@
+from typing import Any, Dict, Optional
+
+from ..configs.config import config
+from .queries import note_word_count
+
+# Fields a client may ask for through ?fields=
+NOTE_FIELDS = {"_id", "id_note", "title", "content", "preview", "word_count", "commands", "schema_version", "created_at", "updated_at"}
+
+# Fields always returned so keyset cursors can be built from any page
+NOTE_KEYSET_FIELDS = ("id_note", "updated_at")
+
+def build_preview(content: Optional[str]) -> str:
+    """Length-capped preview stored alongside the note at write time"""
+    return (content or "")[:config.NOTE_PREVIEW_LENGTH]
+
+def note_summary_projection() -> Dict[str, Any]:
+    """Projection for the list view: ids, title, timestamps, preview and word count, never the full content"""
+    return {"id_note": 1, "title": 1, "created_at": 1, "updated_at": 1, "preview": 1, "word_count": note_word_count()}
+
+def note_projection(fields: Optional[str] = None, view: str = "full") -> Optional[Dict[str, Any]]:
+    """Build the $project stage for a note read, raising ValueError on unknown fields"""
+    if view == "summary":
+        return note_summary_projection()
+    if not fields:
+        return None
+
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested - NOTE_FIELDS
+    if unknown:
+        raise ValueError(f"Unknown fields: {sorted(unknown)}")
+    projection = {field: 1 for field in requested}
+    if "word_count" in projection:
+        projection["word_count"] = note_word_count()
+    projection.update({field: 1 for field in NOTE_KEYSET_FIELDS})
+    return projection
@@ -0,0 +1,56 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..configs.config import config
+
+# Computed fields are evaluated by MongoDB, so documents leave the database API-ready
+def command_computed_fields() -> Dict[str, Any]:
+    return {"_id": {"$toString": "$_id"}}
+
+def note_computed_fields() -> Dict[str, Any]:
+    return {
+        "_id": {"$toString": "$_id"},
+        # Notes written before previews existed fall back to a server-side substring
+        "preview": {"$ifNull": ["$preview", {"$substrCP": [{"$ifNull": ["$content", ""]}, 0, config.NOTE_PREVIEW_LENGTH]}]},
+    }
+
+def note_word_count() -> Dict[str, Any]:
+    """Word count computed on demand in $project (list views), never stored"""
+    return {"$size": {"$regexFindAll": {"input": {"$ifNull": ["$content", ""]}, "regex": r"\S+"}}}
+
+COMPUTED_FIELDS = {
+    "SPEAKER_NOTES": note_computed_fields,
+    "COMMANDS": command_computed_fields,
+}
+
+def shaped_pipeline(
+    collection_name: str,
+    match: Optional[Dict[str, Any]] = None,
+    sort: Optional[List[Tuple[str, int]]] = None,
+    limit: Optional[int] = None,
+    projection: Optional[Dict[str, Any]] = None
+) -> List[Dict[str, Any]]:
+    """Aggregation pipeline returning documents shaped for the API.
+
+    $match/$sort/$limit come first so the indexes and the limit apply before any per-row work.
+    """
+    pipeline = []
+    if match:
+        pipeline.append({"$match": match})
+    if sort:
+        pipeline.append({"$sort": dict(sort)})
+    if limit:
+        pipeline.append({"$limit": limit})
+    pipeline.append({"$set": COMPUTED_FIELDS[collection_name]()})
+    if projection:
+        pipeline.append({"$project": projection})
+    return pipeline
+
+async def aggregate_shaped(collection, collection_name: str, batch_size: Optional[int] = None, **pipeline_options):
+    """Open a cursor over shaped documents (iterate it, or call to_list())"""
+    options = {"batchSize": batch_size} if batch_size else {}
+    return await collection.aggregate(shaped_pipeline(collection_name, **pipeline_options), **options)
+
+async def find_shaped(collection, collection_name: str, **pipeline_options) -> List[Dict[str, Any]]:
+    """Fetch shaped documents into a list"""
+    cursor = await aggregate_shaped(collection, collection_name, **pipeline_options)
+    return await cursor.to_list()
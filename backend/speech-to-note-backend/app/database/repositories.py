@@ -0,0 +1,115 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo.asynchronous.collection import AsyncCollection
+from pymongo.asynchronous.command_cursor import AsyncCommandCursor
+
+from ..configs.config import config
+from .bulk import insert_documents, update_documents
+from .command_cache import CommandCache
+from .pagination import find_page, keyset_sort
+from .queries import aggregate_shaped, find_shaped
+from .sequences import allocate_ids
+from .versions import bump_version, get_version
+
+class MongoRepository:
+    """Typed access to one collection and its sequence/version counters.
+
+    Instances are built once per app in the lifespan and handed to the routes
+    through FastAPI dependencies, so a request never resolves collections itself.
+    """
+
+    collection_name: str
+    id_field: str
+
+    def __init__(self, collection: AsyncCollection, counters: AsyncCollection):
+        self.collection = collection
+        self.counters = counters
+        # Set by the lifespan when LAZY_SCHEMA_UPGRADE is on
+        self.upgrader = None
+
+    def _upgrade(self, docs: List[Dict[str, Any]], projection: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Upgrade old-schema documents on read; projected reads lack the fields the steps rely on"""
+        if self.upgrader is None or projection is not None:
+            return docs
+        return self.upgrader.upgrade(docs)
+
+    async def allocate_ids(self, count: int) -> int:
+        """Reserve `count` consecutive ids and return the first one"""
+        return await allocate_ids(self.counters, self.id_field, count)
+
+    async def version(self) -> int:
+        """Collection version stored in COUNTERS"""
+        return await get_version(self.counters, self.collection_name)
+
+    async def changed(self) -> int:
+        """Record a write so cached listings and ETags are invalidated"""
+        return await bump_version(self.counters, self.collection_name)
+
+    async def insert(self, documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        try:
+            await insert_documents(self.collection, documents)
+        finally:
+            # A failing chunk may follow chunks that were written, and may itself be partly written
+            await self.changed()
+        return documents
+
+    async def update(self, updates: List[Tuple[int, Dict[str, Any]]]) -> Tuple[List[Dict[str, Any]], List[int]]:
+        """Apply the $set of every (id, fields) pair and return (post-images, missing ids)"""
+        updated_docs, not_found_ids = await update_documents(self.collection, self.collection_name, self.id_field, updates)
+        if updated_docs:
+            await self.changed()
+        return updated_docs, not_found_ids
+
+    async def find_all(self, projection: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        return self._upgrade(await find_shaped(self.collection, self.collection_name, projection=projection), projection)
+
+    async def find_page(self, limit: int, after: Optional[str] = None, sort: str = "desc", projection: Optional[Dict[str, Any]] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        docs, next_cursor = await find_page(self.collection, self.collection_name, self.id_field, limit, after, sort, projection)
+        return self._upgrade(docs, projection), next_cursor
+
+    async def stream(self, projection: Optional[Dict[str, Any]] = None) -> AsyncCommandCursor:
+        """Cursor over every document in keyset order, fetched STREAM_BATCH_SIZE at a time"""
+        return await aggregate_shaped(self.collection, self.collection_name, batch_size=config.STREAM_BATCH_SIZE, sort=keyset_sort(self.id_field), projection=projection)
+
+    async def delete_by_id(self, document_id: int) -> int:
+        result = await self.collection.delete_one({self.id_field: document_id})
+        if result.deleted_count:
+            await self.changed()
+        return result.deleted_count
+
+    async def delete_by_ids(self, document_ids: List[int]) -> int:
+        result = await self.collection.delete_many({self.id_field: {"$in": document_ids}})
+        if result.deleted_count:
+            await self.changed()
+        return result.deleted_count
+
+    async def delete_all(self) -> int:
+        result = await self.collection.delete_many({})
+        if result.deleted_count:
+            await self.changed()
+        return result.deleted_count
+
+class SpeakerNoteRepository(MongoRepository):
+    collection_name = "SPEAKER_NOTES"
+    id_field = "id_note"
+
+class SpeakerCommandRepository(MongoRepository):
+    """Commands are read by every client at page load, so the full list goes through a per-app cache"""
+
+    collection_name = "COMMANDS"
+    id_field = "id_command"
+
+    def __init__(self, collection: AsyncCollection, counters: AsyncCollection):
+        super().__init__(collection, counters)
+        self.cache = CommandCache()
+
+    async def changed(self) -> int:
+        return await self.cache.invalidate(self.counters)
+
+    async def find_all(self, projection: Optional[Dict[str, Any]] = None, version: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Full command list from the cache; version, when given, must have just been read with version()"""
+        if projection is not None:
+            return await super().find_all(projection)
+        commands, _ = await self.cache.get(self.collection, self.counters, version)
+        # Cached documents are upgraded in place, so this is a no-op after the first hit
+        return self._upgrade(commands, None)
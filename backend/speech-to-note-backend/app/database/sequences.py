@@ -0,0 +1,27 @@
+from pymongo import ReturnDocument
+
+# Collection name -> field holding its auto-incremented id
+SEQUENCES = {
+    "SPEAKER_NOTES": "id_note",
+    "COMMANDS": "id_command",
+}
+
+async def allocate_ids(counters, sequence_name: str, count: int = 1) -> int:
+    """Atomically reserve `count` consecutive ids and return the first one"""
+    counter = await counters.find_one_and_update(
+        {"_id": sequence_name},
+        {"$inc": {"seq": count}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    return counter["seq"] - count + 1
+
+async def sync_sequence(counters, collection, sequence_name: str):
+    """Make sure a counter is never behind the highest id already stored (e.g. after a restore)"""
+    last_doc = await collection.find_one({}, sort=[(sequence_name, -1)], projection={sequence_name: 1})
+    last_id = last_doc.get(sequence_name, 0) if last_doc else 0
+    await counters.update_one(
+        {"_id": sequence_name},
+        {"$max": {"seq": last_id}},
+        upsert=True
+    )
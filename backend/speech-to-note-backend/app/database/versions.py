@@ -0,0 +1,20 @@
+from pymongo import ReturnDocument
+
+# Collection versions live in the COUNTERS collection next to the id sequences
+def _version_key(collection_name: str) -> str:
+    return f"{collection_name}_version"
+
+async def get_version(counters, collection_name: str) -> int:
+    """Current version of a collection (0 until the first write)"""
+    counter = await counters.find_one({"_id": _version_key(collection_name)})
+    return counter["seq"] if counter else 0
+
+async def bump_version(counters, collection_name: str) -> int:
+    """Atomically increment a collection version after a write and return the new value"""
+    counter = await counters.find_one_and_update(
+        {"_id": _version_key(collection_name)},
+        {"$inc": {"seq": 1}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    return counter["seq"]
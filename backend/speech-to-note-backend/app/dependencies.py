@@ -0,0 +1,25 @@
+from typing import Dict
+
+from fastapi import Request
+from pymongo.asynchronous.collection import AsyncCollection
+from pymongo.asynchronous.database import AsyncDatabase
+
+from .database.pool import PoolMetrics
+from .database.repositories import SpeakerCommandRepository, SpeakerNoteRepository
+
+# FastAPI dependency providers: everything is read from the app instance serving the request
+
+def get_database(request: Request) -> AsyncDatabase:
+    return request.app.state.database
+
+def get_all_collections(request: Request) -> Dict[str, AsyncCollection]:
+    return request.app.state.collections
+
+def get_speaker_note_repository(request: Request) -> SpeakerNoteRepository:
+    return request.app.state.speaker_notes
+
+def get_speaker_command_repository(request: Request) -> SpeakerCommandRepository:
+    return request.app.state.speaker_commands
+
+def get_pool_metrics(request: Request) -> PoolMetrics:
+    return request.app.state.pool_metrics
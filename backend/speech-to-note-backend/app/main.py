@@ -1,14 +1,19 @@
 from contextlib import asynccontextmanager
+from typing import Dict, Optional
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from pymongo import MongoClient
 import uvicorn
 
 from .routes.speaker_note_route import router_speaker_note 
 from .routes.speaker_command_route import router_speaker_command
+from .routes.metrics_route import router_metrics
 from .configs.config import config
-from .migrations.speaker_note_migrations import SpeakerNoteMigrations
-from .migrations.speaker_command_migrations import SpeakerCommandMigrations
+from .migrations.runner import MIGRATIONS, migrate_with_lock, stale_schemas
+from .migrations.lazy import LazyUpgrader
+from .database.sequences import SEQUENCES, sync_sequence
+from .database.indexes import reconcile_indexes
+from .database.pool import PoolMetrics, create_client, warm_up_pool
+from .database.repositories import SpeakerCommandRepository, SpeakerNoteRepository
 from .config_cors import CORS_CONFIG
 
 # Display configuration before starting
@@ -24,76 +29,120 @@ print(f"[STARTUP] 📦 Environment: {config.ENVIRONMENT}", flush=True)
 print(f"[STARTUP] 📊 MongoDB URI: {config.MONGO_URI}", flush=True)
 print(f"[STARTUP] 📊 Database: {config.DATABASE_NAME}", flush=True)
 print(f"[STARTUP] 📊 Collections: {config.COLLECTIONS}", flush=True)
+print(f"[STARTUP] 📊 Pool: min {config.MONGO_MIN_POOL_SIZE} / max {config.MONGO_MAX_POOL_SIZE}, wait queue timeout {config.MONGO_WAIT_QUEUE_TIMEOUT_MS} ms", flush=True)
 print("="*60 + "\n", flush=True)
 
-mongodb_client = None
-database = None
-collections = {}
-
 @asynccontextmanager
-async def app_lifespan(app):
-    global mongodb_client, database, collections
+async def app_lifespan(app: FastAPI):
+    mongodb_client = None
     try:
         print("[STARTUP] 🔗 Connecting to MongoDB...", flush=True)
-        mongodb_client = MongoClient(config.MONGO_URI)
+        pool_metrics = PoolMetrics()
+        mongodb_client = create_client(pool_metrics)
         print("[STARTUP] 🧪 Testing MongoDB connection...", flush=True)
-        mongodb_client.admin.command('ping')
+        await mongodb_client.admin.command('ping')
         print("[STARTUP] ✅ MongoDB connection successful", flush=True)
-        database = mongodb_client[config.DATABASE_NAME]
-        existing_collections = database.list_collection_names()
-        for collection_name in config.COLLECTIONS:
-            if collection_name not in existing_collections:
-                database.create_collection(collection_name)
-                print(f"Created collection: {collection_name}")
+        if config.MONGO_WARM_UP_POOL and config.MONGO_MIN_POOL_SIZE:
+            await warm_up_pool(mongodb_client, config.MONGO_MIN_POOL_SIZE)
+            print(f"[STARTUP] 🔥 Connection pool warmed up ({pool_metrics.open} connections open)", flush=True)
+        database = mongodb_client[app.state.database_name]
+        existing_collections = await database.list_collection_names()
+        collections = {}
+        for collection_name, physical_name in app.state.collection_names.items():
+            if physical_name not in existing_collections:
+                await database.create_collection(physical_name)
+                print(f"Created collection: {physical_name}")
             else:
-                print(f"Collection {collection_name} already exists")
-            collections[collection_name] = database[collection_name]
-        print(f"[STARTUP] 🗄️ Connected to database: {config.DATABASE_NAME}", flush=True)
-        if "SPEAKER_NOTES" in collections:
-            print("[STARTUP] 🔄 Running speaker notes migrations...", flush=True)
-            SpeakerNoteMigrations.run_migrations(collections["SPEAKER_NOTES"])
-        if "COMMANDS" in collections:
-            print("[STARTUP] 🔄 Running commands migrations...", flush=True)
-            SpeakerCommandMigrations.run_migrations(collections["COMMANDS"])
+                print(f"Collection {physical_name} already exists")
+            collections[collection_name] = database[physical_name]
+        print(f"[STARTUP] 🗄️ Connected to database: {app.state.database_name}", flush=True)
+        if config.RECONCILE_INDEXES_ON_STARTUP:
+            print("[STARTUP] 📇 Reconciling indexes...", flush=True)
+            try:
+                # Every worker and replica runs this concurrently: only create what is missing, never drop
+                await reconcile_indexes(collections, drop_unknown=False)
+            except Exception as e:
+                print(f"[STARTUP] ⚠️ Index reconciliation failed: {e}", flush=True)
+        for collection_name, id_field in SEQUENCES.items():
+            if collection_name in collections:
+                await sync_sequence(collections["COUNTERS"], collections[collection_name], id_field)
+        print("[STARTUP] 🔢 ID sequences synchronized", flush=True)
+        if config.RUN_MIGRATIONS_ON_STARTUP:
+            await migrate_with_lock(collections, lock_ttl_seconds=config.MIGRATION_LOCK_TTL_SECONDS)
+        # Otherwise only compare the recorded schema versions: python -m app.migrate does the work
+        stale = await stale_schemas(collections)
+        if stale:
+            print(f"[STARTUP] ⚠️ Schema behind for {stale}, run python -m app.migrate" + (" (old documents are upgraded on read meanwhile)" if config.LAZY_SCHEMA_UPGRADE else ""), flush=True)
+            if config.REQUIRE_CURRENT_SCHEMA:
+                raise RuntimeError(f"Schema migrations pending for {stale}")
+        else:
+            print("[STARTUP] ✅ Schema versions up to date", flush=True)
+
+        # Everything a request needs lives on this app instance, not in module globals
+        app.state.mongodb_client = mongodb_client
+        app.state.pool_metrics = pool_metrics
+        app.state.database = database
+        app.state.collections = collections
+        app.state.speaker_notes = SpeakerNoteRepository(collections["SPEAKER_NOTES"], collections["COUNTERS"])
+        app.state.speaker_commands = SpeakerCommandRepository(collections["COMMANDS"], collections["COUNTERS"])
+        if config.LAZY_SCHEMA_UPGRADE:
+            for repository in (app.state.speaker_notes, app.state.speaker_commands):
+                repository.upgrader = LazyUpgrader(
+                    repository.collection, repository.id_field, MIGRATIONS[repository.collection_name],
+                    config.LAZY_UPGRADE_BATCH_SIZE, config.LAZY_UPGRADE_FLUSH_SECONDS
+                )
+                repository.upgrader.start()
+            print("[STARTUP] 🧬 Lazy schema upgrade on read enabled", flush=True)
         print("[STARTUP] ✅ All systems ready!", flush=True)
     except Exception as e:
         print(f"[STARTUP] ❌ MongoDB connection failed: {e}", flush=True)
+        if mongodb_client:
+            await mongodb_client.close()
         raise
     yield
     try:
-        if mongodb_client:
-            mongodb_client.close()
-            print("[SHUTDOWN] 🔌 MongoDB connection closed", flush=True)
+        for repository in (app.state.speaker_notes, app.state.speaker_commands):
+            if repository.upgrader:
+                await repository.upgrader.stop()
+    except Exception as e:
+        print(f"[SHUTDOWN] ⚠️ Error flushing lazy schema upgrades: {e}", flush=True)
+    try:
+        await mongodb_client.close()
+        print("[SHUTDOWN] 🔌 MongoDB connection closed", flush=True)
     except Exception as e:
         print(f"[SHUTDOWN] ⚠️ Error closing MongoDB connection: {e}", flush=True)
 
-app = FastAPI(
-    title="SpeechToNote API",
-    description="API for managing speaker notes and commands",
-    version=config.CURRENT_APPLICATION_VERSION,
-    lifespan=app_lifespan
-)
-
-app.add_middleware(
-    CORSMiddleware,
-    **CORS_CONFIG
-)
+def create_app(database_name: Optional[str] = None, collection_names: Optional[Dict[str, str]] = None) -> FastAPI:
+    """Build an app instance with its own Mongo client, collections and caches.
 
-print(f"[CORS] Allowed origins: {CORS_CONFIG['allow_origins']}")
+    collection_names maps logical names (SPEAKER_NOTES, COMMANDS, COUNTERS) to the
+    physical collections to use, e.g. the *_TEST collections in the test suite.
+    """
+    app = FastAPI(
+        title="SpeechToNote API",
+        description="API for managing speaker notes and commands",
+        version=config.CURRENT_APPLICATION_VERSION,
+        lifespan=app_lifespan
+    )
+    app.state.database_name = database_name or config.DATABASE_NAME
+    app.state.collection_names = {name: name for name in config.COLLECTIONS}
+    app.state.collection_names.update(collection_names or {})
 
-def get_database():
-    return database
+    app.add_middleware(
+        CORSMiddleware,
+        **CORS_CONFIG
+    )
 
-def get_collection(collection_name: str = "SPEAKER_NOTES"):
-    return collections.get(collection_name)
+    app.include_router(router_speaker_note)
+    app.include_router(router_speaker_command)
+    app.include_router(router_metrics)
+    return app
 
-def get_all_collections():
-    return collections
+app = create_app()
 
-app.include_router(router_speaker_note)
-app.include_router(router_speaker_command)
+print(f"[CORS] Allowed origins: {CORS_CONFIG['allow_origins']}")
 
-__all__ = ["app", "get_database", "get_collection", "get_all_collections"]
+__all__ = ["app", "create_app"]
 
 if __name__ == "__main__":
     print("\n[MAIN] 🌐 Starting uvicorn server...", flush=True)
@@ -0,0 +1,32 @@
+import argparse
+import asyncio
+import sys
+
+from pymongo import AsyncMongoClient
+
+from .configs.config import config
+from .migrations.runner import migrate_with_lock
+
+async def _main(wait: bool, lock_ttl_seconds: float, batch_size: int, sleep_seconds: float) -> int:
+    client = AsyncMongoClient(config.MONGO_URI, serverSelectionTimeoutMS=config.MONGO_SERVER_SELECTION_TIMEOUT_MS)
+    try:
+        database = client[config.DATABASE_NAME]
+        collections = {name: database[name] for name in config.COLLECTIONS}
+        report = await migrate_with_lock(collections, wait, lock_ttl_seconds, batch_size, sleep_seconds)
+        for collection_name, updated_count in report.items():
+            print(f"[MIGRATE] {collection_name}: {updated_count} documents migrated", flush=True)
+        return 0
+    except Exception as e:
+        print(f"[MIGRATE] ❌ Migration failed: {e}", flush=True)
+        return 1
+    finally:
+        await client.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the SpeechToNote schema migrations (Kubernetes Job / init container)")
+    parser.add_argument("--no-wait", action="store_true", help="Exit immediately if another runner holds the lock")
+    parser.add_argument("--lock-ttl", type=float, default=config.MIGRATION_LOCK_TTL_SECONDS, help="Lease of the migration lock, renewed while running")
+    parser.add_argument("--batch-size", type=int, default=config.MIGRATION_BATCH_SIZE, help="Documents migrated per batch (_id order, checkpointed)")
+    parser.add_argument("--sleep", type=float, default=config.MIGRATION_BATCH_SLEEP_SECONDS, help="Pause between batches, in seconds")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(_main(not args.no_wait, args.lock_ttl, args.batch_size, args.sleep)))
@@ -0,0 +1,99 @@
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from .pipeline import source_filter
+from .registry import UNVERSIONED
+
+class LazyUpgrader:
+    """Upgrade old documents on read and write them back in batches.
+
+    Documents served with an old schema_version are upgraded in memory through
+    the migrate_to_v* steps. Their ids are queued and a background task flushes
+    the queue every LAZY_UPGRADE_FLUSH_SECONDS (or as soon as it reaches
+    LAZY_UPGRADE_BATCH_SIZE) with one unordered bulk_write. The write-back
+    re-runs the server-side pipeline filtered on the source version, so an edit
+    made in between is never overwritten with the in-memory copy. Timestamps the
+    steps had to fill in are written back with the exact value that was served,
+    so keyset cursors built from the upgraded copy stay valid.
+    """
+
+    # Fields the migrate_to_v* steps fill with datetime.now() when missing
+    TIMESTAMP_FIELDS = ("created_at", "updated_at")
+
+    def __init__(self, collection, id_field: str, migrations, batch_size: int, flush_seconds: float):
+        self.collection = collection
+        self.id_field = id_field
+        self.migrations = migrations
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.written_back = 0
+        self._pending: Dict[Any, Tuple[str, Dict[str, datetime]]] = {}
+        self._full = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def upgrade(self, docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Upgrade full documents in place and queue their write-back"""
+        current_version = self.migrations.get_current_schema_version()
+        for doc in docs:
+            source_version = doc.get("schema_version") or UNVERSIONED
+            if not self.migrations.REGISTRY.is_older(source_version, current_version):
+                continue
+            update_fields = self.migrations.REGISTRY.upgrade_document(doc, current_version)
+            if not update_fields:
+                continue
+            timestamps = {}
+            for field in self.TIMESTAMP_FIELDS:
+                if field in update_fields:
+                    # MongoDB stores milliseconds: serve what will be read back
+                    value = update_fields[field]
+                    timestamps[field] = doc[field] = value.replace(microsecond=value.microsecond // 1000 * 1000)
+            self._pending[doc[self.id_field]] = (source_version, timestamps)
+        if len(self._pending) >= self.batch_size:
+            self._full.set()
+        return docs
+
+    async def flush(self) -> int:
+        """Write every queued upgrade back in one bulk_write"""
+        if not self._pending:
+            return 0
+        pending, self._pending = self._pending, {}
+        self._full.clear()
+        current_version = self.migrations.get_current_schema_version()
+        operations = [
+            UpdateOne({self.id_field: document_id, **source_filter(source_version)}, self._write_back_pipeline(source_version, current_version, timestamps))
+            for document_id, (source_version, timestamps) in pending.items()
+        ]
+        result = await self.collection.bulk_write(operations, ordered=False)
+        self.written_back += result.modified_count
+        return result.modified_count
+
+    def _write_back_pipeline(self, source_version: str, current_version: str, timestamps: Dict[str, datetime]) -> List[Dict[str, Any]]:
+        """Migration pipeline, preceded by the timestamps already served (only where still missing)"""
+        pipeline = self.migrations.REGISTRY.pipeline(source_version, current_version)
+        if timestamps:
+            pipeline = [{"$set": {field: {"$ifNull": [f"${field}", value]} for field, value in timestamps.items()}}] + pipeline
+        return pipeline
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._full.wait(), timeout=self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"[LAZY_UPGRADE] ⚠️ Write-back failed: {e}", flush=True)
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Cancel the background task and flush what is left"""
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
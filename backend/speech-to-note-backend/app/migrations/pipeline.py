@@ -0,0 +1,112 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from .registry import UNVERSIONED, MigrationRegistry
+
+def source_filter(source_version: str) -> Dict[str, Any]:
+    """Match the documents of one source schema_version"""
+    if source_version == UNVERSIONED:
+        return {"schema_version": None}
+    return {"schema_version": source_version}
+
+async def source_versions(collection, current_version: str, registry: MigrationRegistry) -> List[str]:
+    """Distinct schema_versions still waiting for a migration (index-backed)"""
+    versions = await collection.distinct("schema_version", {"schema_version": {"$ne": current_version}})
+    if await collection.find_one({"schema_version": None}, projection={"_id": 1}):
+        versions.append(UNVERSIONED)
+    return [version for version in versions if isinstance(version, str) and registry.is_older(version, current_version)]
+
+async def run_pipeline_migrations(collection, current_version: str, registry: MigrationRegistry, label: str) -> int:
+    """Migrate every stale document with one update_many per source schema_version"""
+    updated_count = 0
+    for source_version in await source_versions(collection, current_version, registry):
+        pipeline = registry.pipeline(source_version, current_version)
+        if not pipeline:
+            print(f"No migration path for {label} from {source_version} to {current_version}")
+            continue
+        result = await collection.update_many(source_filter(source_version), pipeline)
+        updated_count += result.modified_count
+        print(f"Migrated {result.modified_count} {label} from {source_version} to {current_version}")
+    return updated_count
+
+def _format_eta(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m{seconds:02d}s" if hours else f"{minutes}m{seconds:02d}s"
+
+async def run_batched_migrations(
+    collection,
+    current_version: str,
+    registry: MigrationRegistry,
+    label: str,
+    checkpoints,
+    batch_size: int,
+    sleep_seconds: float = 0.0,
+    lock=None
+) -> int:
+    """Migrate stale documents in _id order, batch_size at a time, checkpointing after each batch.
+
+    The checkpoint ({_id: "checkpoint_<collection>", last_id, target_version})
+    lets a killed runner resume after the last committed batch. Each batch still
+    issues one update_many per source schema_version found in it. When a
+    DistributedLock is given, its ownership is checked before every batch.
+    """
+    versions = await source_versions(collection, current_version, registry)
+    if not versions:
+        return 0
+    stale_filter = {"$or": [source_filter(version) for version in versions]}
+    checkpoint_id = f"checkpoint_{collection.name}"
+    
+    checkpoint = await checkpoints.find_one({"_id": checkpoint_id})
+    last_id: Optional[Any] = None
+    if checkpoint and checkpoint.get("target_version") == current_version:
+        last_id = checkpoint.get("last_id")
+        print(f"[MIGRATE] ↩️ Resuming {label} after _id {last_id}", flush=True)
+    
+    def remaining_filter():
+        return stale_filter if last_id is None else {**stale_filter, "_id": {"$gt": last_id}}
+    
+    total = await collection.count_documents(remaining_filter())
+    processed = updated_count = 0
+    started = time.monotonic()
+    while True:
+        if lock is not None:
+            lock.ensure_held()
+        batch = await collection.find(remaining_filter(), projection={"_id": 1, "schema_version": 1}).sort("_id", 1).limit(batch_size).to_list()
+        if not batch:
+            break
+        
+        groups: Dict[str, List[Any]] = {}
+        for doc in batch:
+            version = doc.get("schema_version")
+            groups.setdefault(version if isinstance(version, str) else UNVERSIONED, []).append(doc["_id"])
+        for source_version, ids in groups.items():
+            pipeline = registry.pipeline(source_version, current_version)
+            if pipeline:
+                result = await collection.update_many({"_id": {"$in": ids}, **source_filter(source_version)}, pipeline)
+                updated_count += result.modified_count
+        
+        last_id = batch[-1]["_id"]
+        processed += len(batch)
+        await checkpoints.update_one(
+            {"_id": checkpoint_id},
+            {"$set": {"last_id": last_id, "target_version": current_version, "updated_at": datetime.now()}},
+            upsert=True
+        )
+        
+        elapsed = time.monotonic() - started
+        rate = processed / elapsed if elapsed else 0.0
+        remaining = max(total - processed, 0)
+        eta = _format_eta(remaining / rate) if rate else "?"
+        print(f"[MIGRATE] {label}: {processed}/{total} ({processed / total:.0%}) {rate:,.0f} docs/s ETA {eta}" if total else f"[MIGRATE] {label}: {processed} docs", flush=True)
+        
+        if len(batch) < batch_size:
+            break
+        if sleep_seconds:
+            # Leave room for live traffic between batches
+            await asyncio.sleep(sleep_seconds)
+    
+    await checkpoints.delete_one({"_id": checkpoint_id})
+    return updated_count
@@ -0,0 +1,99 @@
+from collections import deque
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+# Documents written before schema_version existed
+UNVERSIONED = "0.0.0"
+
+def parse_version(version: Optional[str]) -> Tuple[int, ...]:
+    """"1.0.10" -> (1, 0, 10), so versions order numerically and not as strings"""
+    return tuple(int(part) for part in (version or UNVERSIONED).split("."))
+
+class Migration(NamedTuple):
+    """One schema step, in memory (migrate_to_v*) and as pipeline stages (pipeline_to_v*)"""
+    from_version: str
+    to_version: str
+    document_step: Callable[[Any, Dict[str, Any]], Dict[str, Any]]
+    pipeline_step: Callable[[], List[Dict[str, Any]]]
+
+class MigrationRegistry:
+    """Graph of (from_version, to_version, step) edges.
+
+    A source version is migrated through the shortest chain of steps reaching
+    the target, so shortcut steps (e.g. 0.0.0 -> 1.0.1) win over the long path.
+    Adding a schema version only means registering its step.
+    """
+
+    def __init__(self, migrations: List[Migration]):
+        self._edges: Dict[Tuple[int, ...], List[Migration]] = {}
+        self._versions = set()
+        self._chains: Dict[Tuple[str, str], List[Migration]] = {}
+        for migration in migrations:
+            self.register(migration)
+
+    def register(self, migration: Migration):
+        if parse_version(migration.to_version) <= parse_version(migration.from_version):
+            raise ValueError(f"Migration {migration.from_version} -> {migration.to_version} does not go forward")
+        self._edges.setdefault(parse_version(migration.from_version), []).append(migration)
+        self._versions.update({parse_version(migration.from_version), parse_version(migration.to_version)})
+        self._chains.clear()
+
+    def is_older(self, version: Optional[str], target_version: str) -> bool:
+        try:
+            return parse_version(version) < parse_version(target_version)
+        except ValueError:
+            # Not a dotted numeric version: leave the document alone
+            return False
+
+    def _start(self, source_version: str) -> Optional[Tuple[int, ...]]:
+        """Registered version to start from: the source itself, else the closest older one"""
+        source = parse_version(source_version)
+        known = [version for version in self._versions if version <= source]
+        return max(known) if known else None
+
+    def chain(self, source_version: Optional[str], target_version: str) -> List[Migration]:
+        """Shortest list of steps from source_version to target_version (breadth-first)"""
+        source_version = source_version or UNVERSIONED
+        key = (source_version, target_version)
+        if key in self._chains:
+            return self._chains[key]
+
+        start, target = self._start(source_version), parse_version(target_version)
+        if parse_version(source_version) >= target:
+            start = None
+        previous: Dict[Tuple[int, ...], Optional[Migration]] = {start: None}
+        queue = deque([start] if start is not None else [])
+        while queue:
+            version = queue.popleft()
+            if version == target:
+                break
+            for migration in self._edges.get(version, []):
+                next_version = parse_version(migration.to_version)
+                if next_version <= target and next_version not in previous:
+                    previous[next_version] = migration
+                    queue.append(next_version)
+
+        steps: List[Migration] = []
+        if target in previous and start != target:
+            version = target
+            while previous[version] is not None:
+                steps.append(previous[version])
+                version = parse_version(previous[version].from_version)
+            steps.reverse()
+        self._chains[key] = steps
+        return steps
+
+    def pipeline(self, source_version: Optional[str], target_version: str) -> List[Dict[str, Any]]:
+        """update-with-aggregation-pipeline stages of the whole chain"""
+        stages = []
+        for migration in self.chain(source_version, target_version):
+            stages.extend(migration.pipeline_step())
+        return stages
+
+    def upgrade_document(self, doc: Dict[str, Any], target_version: str) -> Dict[str, Any]:
+        """Apply the chain to doc in place and return the fields it changed"""
+        update_fields = {}
+        for migration in self.chain(doc.get("schema_version"), target_version):
+            fields = migration.document_step(None, doc)
+            update_fields.update(fields)
+            doc.update(fields)
+        return update_fields
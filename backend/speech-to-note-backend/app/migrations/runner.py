@@ -0,0 +1,68 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from ..database.locks import DistributedLock
+from ..database.versions import bump_version
+from .speaker_note_migrations import SpeakerNoteMigrations
+from .speaker_command_migrations import SpeakerCommandMigrations
+
+# Collection name -> migrations class
+MIGRATIONS = {
+    "SPEAKER_NOTES": SpeakerNoteMigrations,
+    "COMMANDS": SpeakerCommandMigrations,
+}
+
+LOCK_NAME = "lock"
+
+def _state_id(collection_name: str) -> str:
+    return f"schema_{collection_name}"
+
+async def migrate_all(collections, batch_size: int = None, sleep_seconds: float = None, lock: Optional[DistributedLock] = None) -> Dict[str, int]:
+    """Run every collection's migrations in resumable batches and record the schema version reached.
+
+    With a lock, ownership is checked between batches: a runner that lost its
+    lease stops (LockLostError) and leaves the rest to the new holder.
+    """
+    report = {}
+    for collection_name, migrations in MIGRATIONS.items():
+        if collection_name not in collections:
+            continue
+        print(f"[MIGRATE] 🔄 Running {collection_name} migrations...", flush=True)
+        updated_count = await migrations.run_migrations(collections[collection_name], collections["MIGRATIONS"], batch_size, sleep_seconds, lock)
+        if lock is not None:
+            lock.ensure_held()
+        if updated_count:
+            await bump_version(collections["COUNTERS"], collection_name)
+        await collections["MIGRATIONS"].update_one(
+            {"_id": _state_id(collection_name)},
+            {"$set": {"schema_version": migrations.get_current_schema_version(), "migrated_at": datetime.now()}},
+            upsert=True
+        )
+        report[collection_name] = updated_count
+    return report
+
+async def migrate_with_lock(collections, wait: bool = True, lock_ttl_seconds: float = 60.0, batch_size: int = None, sleep_seconds: float = None) -> Dict[str, int]:
+    """Run the migrations in at most one process at a time; return {} when skipped"""
+    lock = DistributedLock(collections["MIGRATIONS"], LOCK_NAME, ttl_seconds=lock_ttl_seconds)
+    if not await lock.acquire(wait=wait):
+        print("[MIGRATE] ⏭️ Another runner holds the migration lock, skipping", flush=True)
+        return {}
+    try:
+        # A runner we waited for may already have done everything
+        if not await stale_schemas(collections):
+            print("[MIGRATE] ✅ Schemas already up to date", flush=True)
+            return {}
+        return await migrate_all(collections, batch_size, sleep_seconds, lock)
+    finally:
+        await lock.release()
+
+async def stale_schemas(collections) -> List[str]:
+    """Collections whose recorded schema version differs from the one this build expects"""
+    stale = []
+    for collection_name, migrations in MIGRATIONS.items():
+        if collection_name not in collections:
+            continue
+        state = await collections["MIGRATIONS"].find_one({"_id": _state_id(collection_name)})
+        if not state or state.get("schema_version") != migrations.get_current_schema_version():
+            stale.append(collection_name)
+    return stale
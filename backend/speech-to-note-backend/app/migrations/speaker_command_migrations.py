@@ -1,6 +1,8 @@
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, List
 from ..configs.config import config
+from .pipeline import run_batched_migrations, run_pipeline_migrations
+from .registry import Migration, MigrationRegistry
 
 class SpeakerCommandMigrations:
     """Handle speaker command schema migrations"""
@@ -49,55 +51,70 @@ class SpeakerCommandMigrations:
         if "html_tag_end" not in doc:
             update_fields["html_tag_end"] = ""
         
-        # Update schema version
+        # Update schema version (a schema-only upgrade keeps updated_at, so keyset cursors stay valid)
         update_fields["schema_version"] = "1.0.1"
-        update_fields["updated_at"] = datetime.now()
+        if "updated_at" not in doc:
+            update_fields["updated_at"] = datetime.now()
         
         return update_fields
     
     @staticmethod
-    def run_migrations(collection):
-        """Run all necessary migrations"""
+    def pipeline_to_v1_0_0() -> List[Dict[str, Any]]:
+        """Server-side version of migrate_to_v1_0_0"""
+        now = datetime.now()
+        return [{"$set": {
+            "command_description": {"$ifNull": ["$command_description", None]},
+            "created_at": {"$ifNull": ["$created_at", now]},
+            "updated_at": {"$ifNull": ["$updated_at", now]},
+            "schema_version": "1.0.0"
+        }}]
+    
+    @staticmethod
+    def pipeline_to_v1_0_1() -> List[Dict[str, Any]]:
+        """Server-side version of migrate_to_v1_0_1"""
+        return [{"$set": {
+            # Wrap a legacy string command_vocal into a one-element list, default to []
+            "command_vocal": {"$cond": [
+                {"$eq": [{"$type": "$command_vocal"}, "string"]},
+                ["$command_vocal"],
+                {"$ifNull": ["$command_vocal", []]}
+            ]},
+            "html_tag_start": {"$ifNull": ["$html_tag_start", ""]},
+            "html_tag_end": {"$ifNull": ["$html_tag_end", ""]},
+            "schema_version": "1.0.1",
+            "updated_at": {"$ifNull": ["$updated_at", datetime.now()]}
+        }}]
+    
+    # (from_version, to_version, step) edges; a new schema version only needs a new line here
+    REGISTRY = MigrationRegistry([
+        Migration("0.0.0", "1.0.0", migrate_to_v1_0_0, pipeline_to_v1_0_0),
+        Migration("1.0.0", "1.0.1", migrate_to_v1_0_1, pipeline_to_v1_0_1),
+    ])
+    
+    @staticmethod
+    async def run_migrations(collection, checkpoints=None, batch_size: int = None, sleep_seconds: float = None, lock=None):
+        """Run all necessary migrations (batched and resumable when a checkpoints collection is given)"""
         try:
             current_version = SpeakerCommandMigrations.get_current_schema_version()
             
-            # Find documents that need migration
-            documents_to_migrate = list(collection.find({
-                "$or": [
-                    {"schema_version": {"$exists": False}},
-                    {"schema_version": {"$ne": current_version}}
-                ]
-            }))
-            
-            updated_count = 0
-            
-            for doc in documents_to_migrate:
-                doc_version = doc.get("schema_version", "0.0.0")
-                update_fields = {}
-                
-                # Apply migrations step by step
-                if doc_version < "1.0.0":
-                    v1_0_0_fields = SpeakerCommandMigrations.migrate_to_v1_0_0(collection, doc)
-                    update_fields.update(v1_0_0_fields)
-                    # Update doc with v1.0.0 fields for next migration
-                    doc.update(v1_0_0_fields)
-                
-                if doc_version < "1.0.1":
-                    v1_0_1_fields = SpeakerCommandMigrations.migrate_to_v1_0_1(collection, doc)
-                    update_fields.update(v1_0_1_fields)
-                
-                if update_fields:
-                    collection.update_one(
-                        {"_id": doc["_id"]},
-                        {"$set": update_fields}
-                    )
-                    updated_count += 1
-                    print(f"Migrated document {doc.get('command_name', 'unknown')} to {current_version}")
+            if checkpoints is not None:
+                # _id-ordered batches with a checkpoint, throttled for live traffic
+                updated_count = await run_batched_migrations(
+                    collection, current_version, SpeakerCommandMigrations.REGISTRY, "speaker commands", checkpoints,
+                    batch_size or config.MIGRATION_BATCH_SIZE,
+                    config.MIGRATION_BATCH_SLEEP_SECONDS if sleep_seconds is None else sleep_seconds,
+                    lock
+                )
+            else:
+                # One update_many per source schema_version, evaluated inside MongoDB
+                updated_count = await run_pipeline_migrations(collection, current_version, SpeakerCommandMigrations.REGISTRY, "speaker commands")
             
             if updated_count > 0:
                 print(f"Successfully migrated {updated_count} speaker commands to version {current_version}")
             else:
                 print(f"All speaker commands are already at version {current_version}")
+            
+            return updated_count
                 
         except Exception as e:
             print(f"Speaker command migration error: {e}")
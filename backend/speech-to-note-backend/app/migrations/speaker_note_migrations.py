@@ -1,6 +1,8 @@
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, List
 from ..configs.config import config
+from .pipeline import run_batched_migrations, run_pipeline_migrations
+from .registry import Migration, MigrationRegistry
 
 class SpeakerNoteMigrations:
     """Handle speaker note schema migrations"""
@@ -31,40 +33,46 @@ class SpeakerNoteMigrations:
         return update_fields
     
     @staticmethod
-    def run_migrations(collection):
-        """Run all necessary migrations"""
+    def pipeline_to_v1_0_0() -> List[Dict[str, Any]]:
+        """Server-side version of migrate_to_v1_0_0"""
+        now = datetime.now()
+        return [{"$set": {
+            "commands": {"$ifNull": ["$commands", []]},
+            "created_at": {"$ifNull": ["$created_at", now]},
+            "updated_at": {"$ifNull": ["$updated_at", now]},
+            "schema_version": "1.0.0"
+        }}]
+    
+    # (from_version, to_version, step) edges; a new schema version only needs a new line here
+    REGISTRY = MigrationRegistry([
+        Migration("0.0.0", "1.0.0", migrate_to_v1_0_0, pipeline_to_v1_0_0),
+    ])
+    
+    @staticmethod
+    async def run_migrations(collection, checkpoints=None, batch_size: int = None, sleep_seconds: float = None, lock=None):
+        """Run all necessary migrations (batched and resumable when a checkpoints collection is given)"""
         try:
             current_version = SpeakerNoteMigrations.get_current_schema_version()
             
-            # Find documents that need migration
-            documents_to_migrate = list(collection.find({
-                "$or": [
-                    {"schema_version": {"$exists": False}},
-                    {"schema_version": {"$ne": current_version}}
-                ]
-            }))
-            
-            updated_count = 0
-            
-            for doc in documents_to_migrate:
-                doc_version = doc.get("schema_version", "0.0.0")
-                
-                # Apply migrations based on current version
-                if doc_version != current_version:
-                    update_fields = SpeakerNoteMigrations.migrate_to_v1_0_0(collection, doc)
-                    
-                    if update_fields:
-                        collection.update_one(
-                            {"_id": doc["_id"]},
-                            {"$set": update_fields}
-                        )
-                        updated_count += 1
+            if checkpoints is not None:
+                # _id-ordered batches with a checkpoint, throttled for live traffic
+                updated_count = await run_batched_migrations(
+                    collection, current_version, SpeakerNoteMigrations.REGISTRY, "speaker notes", checkpoints,
+                    batch_size or config.MIGRATION_BATCH_SIZE,
+                    config.MIGRATION_BATCH_SLEEP_SECONDS if sleep_seconds is None else sleep_seconds,
+                    lock
+                )
+            else:
+                # One update_many per source schema_version, evaluated inside MongoDB
+                updated_count = await run_pipeline_migrations(collection, current_version, SpeakerNoteMigrations.REGISTRY, "speaker notes")
             
             if updated_count > 0:
                 print(f"Successfully migrated {updated_count} speaker notes to version {current_version}")
             else:
                 print(f"All speaker notes are already at version {current_version}")
+            
+            return updated_count
                 
         except Exception as e:
             print(f"Migration error: {e}")
-            raise
+            raise
\ No newline at end of file
@@ -6,15 +6,16 @@ class BaseResponse(BaseModel):
     data: Any = None
     status_code: int
     message: str
+    next_cursor: Optional[str] = None
     
     class Config:
         # Allow arbitrary types for the data field
         arbitrary_types_allowed = True
         
     @classmethod
-    def success(cls, data: Any = None, message: str = "Success", status_code: int = 200):
+    def success(cls, data: Any = None, message: str = "Success", status_code: int = 200, next_cursor: Optional[str] = None):
         """Create a successful response"""
-        return cls(data=data, status_code=status_code, message=message)
+        return cls(data=data, status_code=status_code, message=message, next_cursor=next_cursor)
     
     @classmethod
     def error(cls, message: str, status_code: int = 400, data: Any = None):
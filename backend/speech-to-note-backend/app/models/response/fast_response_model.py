@@ -0,0 +1,49 @@
+from typing import Any, List, Optional
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from typing_extensions import TypedDict
+
+from ..speaker_note.speaker_note_model import SpeakerNoteDocument
+from ..speaker_command.speaker_command_model import SpeakerCommandDocument
+
+class SpeakerNoteListEnvelope(TypedDict):
+    """BaseResponse envelope carrying a list of speaker notes"""
+    data: List[SpeakerNoteDocument]
+    status_code: int
+    message: str
+    next_cursor: Optional[str]
+
+class SpeakerCommandListEnvelope(TypedDict):
+    """BaseResponse envelope carrying a list of speaker commands"""
+    data: List[SpeakerCommandDocument]
+    status_code: int
+    message: str
+    next_cursor: Optional[str]
+
+# Built once at import: the core serializers are compiled a single time, not per request
+SPEAKER_NOTE_LIST_ADAPTER = TypeAdapter(SpeakerNoteListEnvelope)
+SPEAKER_COMMAND_LIST_ADAPTER = TypeAdapter(SpeakerCommandListEnvelope)
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered straight to bytes by a precompiled pydantic-core serializer.
+
+    Skips FastAPI's response_model validation and jsonable_encoder walk.
+    """
+
+    def __init__(self, content: Any, adapter: TypeAdapter, **kwargs):
+        self.adapter = adapter
+        super().__init__(content, **kwargs)
+
+    def render(self, content: Any) -> bytes:
+        return self.adapter.dump_json(content)
+
+def speaker_note_list_response(data: List[dict], message: str, status_code: int = 200, next_cursor: Optional[str] = None) -> FastJSONResponse:
+    """Successful BaseResponse-shaped answer for a list of notes"""
+    envelope = {"data": data, "status_code": status_code, "message": message, "next_cursor": next_cursor}
+    return FastJSONResponse(envelope, SPEAKER_NOTE_LIST_ADAPTER)
+
+def speaker_command_list_response(data: List[dict], message: str, status_code: int = 200, next_cursor: Optional[str] = None) -> FastJSONResponse:
+    """Successful BaseResponse-shaped answer for a list of commands"""
+    envelope = {"data": data, "status_code": status_code, "message": message, "next_cursor": next_cursor}
+    return FastJSONResponse(envelope, SPEAKER_COMMAND_LIST_ADAPTER)
@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field
 from typing import Optional, List
+from typing_extensions import TypedDict
 from datetime import datetime
 
 
@@ -46,3 +47,17 @@ class SpeakerCommand(BaseModel):
                 "html_tag_end": "</h1>",
             }
         }
+
+
+class SpeakerCommandDocument(TypedDict, total=False):
+    """Forme d'une commande telle que renvoyée par l'API (sérialisée sans validation)"""
+    _id: str
+    id_command: int
+    command_name: str
+    command_vocal: List[str]
+    command_description: Optional[str]
+    html_tag_start: Optional[str]
+    html_tag_end: Optional[str]
+    schema_version: str
+    created_at: datetime
+    updated_at: datetime
@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field
 from typing import List, Optional
+from typing_extensions import TypedDict
 from datetime import datetime
 
 
@@ -23,6 +24,7 @@ class SpeakerNote(BaseModel):
     id_note: Optional[int] = Field(None, description="Identifiant unique de la note")
     title: Optional[str] = Field(None, min_length=1, max_length=200, description="Titre de la note")
     content: Optional[str] = Field(None, description="Contenu de la note")
+    preview: Optional[str] = Field(None, description="Aperçu tronqué du contenu")
     commands: Optional[List[str]] = Field(None, description="Liste des commandes associées")
     schema_version: Optional[str] = Field(default="1.0.0", description="Version du schéma de données")
     created_at: Optional[datetime] = Field(None, description="Date de création")
@@ -36,4 +38,17 @@ class SpeakerNote(BaseModel):
                 "title": "Ma première note",
                 "content": "Ceci est le contenu de ma note dictée vocalement",
             }
-        }
\ No newline at end of file
+        }
+
+class SpeakerNoteDocument(TypedDict, total=False):
+    """Forme d'une note telle que renvoyée par l'API (sérialisée sans validation)"""
+    _id: str
+    id_note: int
+    title: str
+    content: str
+    preview: str
+    word_count: int
+    commands: List[str]
+    schema_version: str
+    created_at: datetime
+    updated_at: datetime
@@ -0,0 +1,19 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+from ..models.response.base_response_model import BaseResponse
+from ..database.pool import PoolMetrics
+from ..dependencies import get_pool_metrics
+
+router_metrics = APIRouter(prefix="/metrics", tags=["metrics"])
+
+# Prometheus scrape endpoint
+@router_metrics.get("", response_class=PlainTextResponse)
+async def get_metrics(pool_metrics: PoolMetrics = Depends(get_pool_metrics)):
+    """Export the MongoDB connection pool metrics in Prometheus text format."""
+    return PlainTextResponse(pool_metrics.prometheus(), media_type="text/plain; version=0.0.4")
+
+# Connection pool metrics
+@router_metrics.get("/pool", response_model=BaseResponse)
+async def get_pool_metrics_snapshot(pool_metrics: PoolMetrics = Depends(get_pool_metrics)):
+    """Get MongoDB connection pool usage and checkout wait times."""
+    return BaseResponse.success(pool_metrics.snapshot(), "Pool metrics retrieved successfully")
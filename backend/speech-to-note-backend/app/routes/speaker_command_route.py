@@ -1,7 +1,12 @@
-from fastapi import APIRouter, Body
+from fastapi import APIRouter, Body, Depends, Query, Request
 from datetime import datetime
-from typing import List
+from typing import List, Literal, Optional
 from ..models.response.base_response_model import BaseResponse
+from ..models.response.fast_response_model import speaker_command_list_response
+from ..database.repositories import SpeakerCommandRepository
+from ..dependencies import get_speaker_command_repository
+from ..utils.streaming import StreamFormat, stream_documents
+from ..utils.etag import build_etag, etag_matches, not_modified, set_etag_headers
 from ..models.speaker_command.sc_request_model import SCCreateRequest, SCUpdateRequest, SCDeleteByIdsRequest
 from ..configs.config import config
 
@@ -9,168 +14,174 @@ router_speaker_command = APIRouter(prefix="/speaker_commands", tags=["speaker_co
 
 # Create a speaker_command
 @router_speaker_command.post("/", response_model=BaseResponse)
-async def create_speaker_command(request: SCCreateRequest):
+async def create_speaker_command(request: SCCreateRequest, repository: SpeakerCommandRepository = Depends(get_speaker_command_repository)):
     """Create a new speaker command."""
-    from ..main import get_collection
-    collection = get_collection("COMMANDS")
-    
     # Validate that we have data to process
     if not request.data:
         return BaseResponse.error("Data array is required", 400)
     
+    # Validate the whole batch up front so nothing is written if one item is invalid
+    for speaker_command_create in request.data:
+        # Validate that command_vocal is not empty and doesn't contain empty strings
+        if not speaker_command_create.command_vocal or not all(vocal.strip() for vocal in speaker_command_create.command_vocal):
+            return BaseResponse.error("command_vocal must contain at least one non-empty vocal command", 400)
+    
     try:
-        if collection is not None:
-            created_commands = []
-            
-            # Get the highest id_command to continue the sequence
-            last_command = collection.find_one({}, sort=[("id_command", -1)])
-            next_id = (last_command["id_command"] + 1) if last_command and "id_command" in last_command else 1
+        created_commands = []
+        
+        # Reserve a block of id_command values for the whole batch in one round trip
+        next_id = await repository.allocate_ids(len(request.data))
+        
+        for speaker_command_create in request.data:
+            # Convert Pydantic model to dict for MongoDB
+            speaker_command_dump = speaker_command_create.model_dump()
             
-            for speaker_command_create in request.data:
-                # Validate that command_vocal is not empty and doesn't contain empty strings
-                if not speaker_command_create.command_vocal or not all(vocal.strip() for vocal in speaker_command_create.command_vocal):
-                    return BaseResponse.error("command_vocal must contain at least one non-empty vocal command", 400)
-                
-                # Convert Pydantic model to dict for MongoDB
-                speaker_command_dump = speaker_command_create.model_dump()
-                
-                # Add auto-incremented id_command and timestamps (local time)
-                current_time = datetime.now()  # Use local timezone
-                speaker_command_dump["id_command"] = next_id
-                speaker_command_dump["schema_version"] = config.CURRENT_SC_SCHEMA_VERSION
-                speaker_command_dump["created_at"] = current_time
-                speaker_command_dump["updated_at"] = current_time
-                
-                next_id += 1
-                
-                result = collection.insert_one(speaker_command_dump)
-                speaker_command_dump["_id"] = str(result.inserted_id)
-                created_commands.append(speaker_command_dump)
+            # Add auto-incremented id_command and timestamps (local time)
+            current_time = datetime.now()  # Use local timezone
+            speaker_command_dump["id_command"] = next_id
+            speaker_command_dump["schema_version"] = config.CURRENT_SC_SCHEMA_VERSION
+            speaker_command_dump["created_at"] = current_time
+            speaker_command_dump["updated_at"] = current_time
             
-            return BaseResponse.success(created_commands, "Speaker commands created successfully", 201)
-        return BaseResponse.error("No collection found", 500)
+            next_id += 1
+            created_commands.append(speaker_command_dump)
+        
+        # Write the whole batch with insert_many (chunked by MAX_INSERT_BATCH_SIZE), then invalidate the cache
+        await repository.insert(created_commands)
+        
+        return speaker_command_list_response(created_commands, "Speaker commands created successfully", 201)
     except Exception as e:
         return BaseResponse.error(f"Failed to create speaker commands: {str(e)}", 500)
 
 # Get all speaker commands
 @router_speaker_command.get("/", response_model=BaseResponse)
-async def get_speaker_commands():
-    """Get all speaker commands."""    
-    from ..main import get_collection
-    collection = get_collection("COMMANDS")
-    if collection is not None:
-        try:
-            # Get all speaker commands and convert ObjectId to string
-            speaker_commands = list(collection.find({}))
-            for command in speaker_commands:
-                command["_id"] = str(command["_id"])
-            
-            return BaseResponse.success(speaker_commands, "Speaker commands retrieved successfully")
-        except Exception as e:
-            return BaseResponse.error(f"Failed to retrieve speaker commands: {str(e)}", 500)
-    return BaseResponse.error("No collection found", 500)
+async def get_speaker_commands(
+    request: Request,
+    limit: int = Query(config.DEFAULT_PAGE_SIZE, ge=1, le=config.MAX_PAGE_SIZE, description="Page size"),
+    after: Optional[str] = Query(None, description="Opaque cursor returned as next_cursor by the previous page"),
+    sort: Literal["asc", "desc"] = Query("desc", description="Order on (updated_at, id_command)"),
+    fetch_all: bool = Query(False, alias="all", description="Return every command in one unpaginated response"),
+    repository: SpeakerCommandRepository = Depends(get_speaker_command_repository)
+):
+    """Get speaker commands, one keyset page at a time."""
+    try:
+        # Conditional GET: the ETag comes from the command-set version (one COUNTERS lookup), not the payload
+        version = await repository.version()
+        etag = build_etag("COMMANDS", version, request)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        
+        if fetch_all:
+            # Full listing fetched by every client at page load: served from the in-process cache,
+            # validated against the version the ETag was built from
+            speaker_commands = await repository.find_all(version=version)
+            next_cursor = None
+        else:
+            speaker_commands, next_cursor = await repository.find_page(limit, after, sort)
+        
+        response = speaker_command_list_response(speaker_commands, "Speaker commands retrieved successfully", next_cursor=next_cursor)
+        set_etag_headers(response, etag)
+        return response
+    except ValueError as e:
+        return BaseResponse.error(str(e), 400)
+    except Exception as e:
+        return BaseResponse.error(f"Failed to retrieve speaker commands: {str(e)}", 500)
+
+# Get the command-set version and cache statistics
+@router_speaker_command.get("/version", response_model=BaseResponse)
+async def get_speaker_commands_version(repository: SpeakerCommandRepository = Depends(get_speaker_command_repository)):
+    """Get the current command-set version and the command cache hit ratio."""
+    try:
+        version = await repository.version()
+        return BaseResponse.success({**repository.cache.stats(), "version": version}, "Speaker commands version retrieved successfully")
+    except Exception as e:
+        return BaseResponse.error(f"Failed to retrieve speaker commands version: {str(e)}", 500)
+
+# Stream all speaker commands (exports and large syncs)
+@router_speaker_command.get("/stream")
+async def stream_speaker_commands(
+    format: StreamFormat = Query("ndjson", description="ndjson (one command per line) or json (a single array)"),
+    repository: SpeakerCommandRepository = Depends(get_speaker_command_repository)
+):
+    """Stream every speaker command straight from the Mongo cursor."""
+    return stream_documents(await repository.stream(), format)
 
 # Update speaker commands
 @router_speaker_command.put("/", response_model=BaseResponse)
-async def update_speaker_commands(request: SCUpdateRequest):
+async def update_speaker_commands(request: SCUpdateRequest, repository: SpeakerCommandRepository = Depends(get_speaker_command_repository)):
     """Update multiple speaker commands."""
-    from ..main import get_collection
-    collection = get_collection("COMMANDS")
-    
     if not request.data:
         return BaseResponse.error("Data array is required", 400)
     
+    # Validate the whole batch up front so nothing is written if one item is invalid
+    for speaker_command_update in request.data:
+        # Validate command_vocal if provided
+        if speaker_command_update.command_vocal is not None:
+            if not speaker_command_update.command_vocal or not all(vocal.strip() for vocal in speaker_command_update.command_vocal):
+                return BaseResponse.error("command_vocal must contain at least one non-empty vocal command", 400)
+    
     try:
-        if collection is not None:
-            updated_commands = []
-            for speaker_command_update in request.data:
-                # Validate command_vocal if provided
-                if speaker_command_update.command_vocal is not None:
-                    if not speaker_command_update.command_vocal or not all(vocal.strip() for vocal in speaker_command_update.command_vocal):
-                        return BaseResponse.error("command_vocal must contain at least one non-empty vocal command", 400)
-                
-                # id_command is guaranteed to exist because of SpeakerCommandUpdate model
-                id_command = speaker_command_update.id_command
-                
-                # Convert to dict and exclude None values and id_command
-                update_data = {k: v for k, v in speaker_command_update.model_dump(exclude={'id_command'}).items() if v is not None}
-                update_data["updated_at"] = datetime.now()  # Always update timestamp
-                
-                result = collection.update_one(
-                    {"id_command": id_command},
-                    {"$set": update_data}
-                )
-                
-                if result.matched_count == 0:
-                    return BaseResponse.error(f"Speaker command with id_command {id_command} not found", 404)
-                
-                # Get the updated document
-                updated_doc = collection.find_one({"id_command": id_command})
-                if updated_doc:
-                    updated_doc["_id"] = str(updated_doc["_id"])
-                    updated_commands.append(updated_doc)
+        updates = []
+        for speaker_command_update in request.data:
+            # id_command is guaranteed to exist because of SpeakerCommandUpdate model
+            id_command = speaker_command_update.id_command
             
-            return BaseResponse.success(updated_commands, "Speaker commands updated successfully")
-        return BaseResponse.error("No collection found", 500)
+            # Convert to dict and exclude None values and id_command
+            update_data = {k: v for k, v in speaker_command_update.model_dump(exclude={'id_command'}).items() if v is not None}
+            update_data["updated_at"] = datetime.now()  # Always update timestamp
+            updates.append((id_command, update_data))
+        
+        # Send every $set in one round trip, then fetch the post-images in one query
+        updated_commands, not_found_ids = await repository.update(updates)
+        
+        if not_found_ids:
+            if len(not_found_ids) == 1:
+                return BaseResponse.error(f"Speaker command with id_command {not_found_ids[0]} not found", 404, updated_commands)
+            return BaseResponse.error(f"Speaker commands with id_command {not_found_ids} not found", 404, updated_commands)
+        
+        return speaker_command_list_response(updated_commands, "Speaker commands updated successfully")
     except Exception as e:
         return BaseResponse.error(f"Failed to update speaker commands: {str(e)}", 500)
 
 # Delete multiple speaker commands by IDs
 @router_speaker_command.delete("/ids", response_model=BaseResponse)
-async def delete_speaker_commands_by_ids(request: SCDeleteByIdsRequest):
+async def delete_speaker_commands_by_ids(request: SCDeleteByIdsRequest, repository: SpeakerCommandRepository = Depends(get_speaker_command_repository)):
     """Delete multiple speaker commands by their IDs."""
-    from ..main import get_collection
-    collection = get_collection("COMMANDS")
-    
     if not request.ids_command:
         return BaseResponse.error("IDs array is required", 400)
     
     try:
-        if collection is not None:
-            result = collection.delete_many({"id_command": {"$in": request.ids_command}})
-            
-            return BaseResponse.success(
-                {"deleted_count": result.deleted_count}, 
-                f"Speaker commands deleted successfully. {result.deleted_count} commands removed."
-            )
-        return BaseResponse.error("No collection found", 500)
+        deleted_count = await repository.delete_by_ids(request.ids_command)
+        
+        return BaseResponse.success(
+            {"deleted_count": deleted_count}, 
+            f"Speaker commands deleted successfully. {deleted_count} commands removed."
+        )
     except Exception as e:
         return BaseResponse.error(f"Failed to delete speaker commands: {str(e)}", 500)
 
 # Delete a specific speaker command
 @router_speaker_command.delete("/{id_command}", response_model=BaseResponse)
-async def delete_speaker_command(id_command: int):
+async def delete_speaker_command(id_command: int, repository: SpeakerCommandRepository = Depends(get_speaker_command_repository)):
     """Delete a specific speaker command by ID."""
-    from ..main import get_collection
-    collection = get_collection("COMMANDS")
-    
     try:
-        if collection is not None:
-            result = collection.delete_one({"id_command": id_command})
-            
-            if result.deleted_count == 0:
-                return BaseResponse.error("Speaker command not found", 404)
+        if await repository.delete_by_id(id_command) == 0:
+            return BaseResponse.error("Speaker command not found", 404)
 
-            return BaseResponse.success({"deleted_id_command": id_command}, f"Speaker command with id {id_command} deleted successfully")
-        return BaseResponse.error("No collection found", 500)
+        return BaseResponse.success({"deleted_id_command": id_command}, f"Speaker command with id {id_command} deleted successfully")
     except Exception as e:
         return BaseResponse.error(f"Failed to delete speaker command: {str(e)}", 500)
 
 # Delete all speaker commands
 @router_speaker_command.delete("/", response_model=BaseResponse)
-async def delete_all_speaker_commands():
+async def delete_all_speaker_commands(repository: SpeakerCommandRepository = Depends(get_speaker_command_repository)):
     """Delete all speaker commands."""
-    from ..main import get_collection
-    collection = get_collection("COMMANDS")
-    
     try:
-        if collection is not None:
-            result = collection.delete_many({})
-            
-            return BaseResponse.success(
-                {"deleted_count": result.deleted_count}, 
-                f"All speaker commands deleted successfully. {result.deleted_count} commands removed."
-            )
-        return BaseResponse.error("No collection found", 500)
+        deleted_count = await repository.delete_all()
+        
+        return BaseResponse.success(
+            {"deleted_count": deleted_count}, 
+            f"All speaker commands deleted successfully. {deleted_count} commands removed."
+        )
     except Exception as e:
         return BaseResponse.error(f"Failed to delete all speaker commands: {str(e)}", 500)
\ No newline at end of file
@@ -1,169 +1,181 @@
-from fastapi import APIRouter, Body
+from fastapi import APIRouter, Body, Depends, Query, Request
 from datetime import datetime
+from typing import Literal, Optional
 from ..models.response.base_response_model import BaseResponse
+from ..models.response.fast_response_model import speaker_note_list_response
+from ..database.projections import build_preview, note_projection
+from ..database.repositories import SpeakerNoteRepository
+from ..dependencies import get_speaker_note_repository
+from ..utils.streaming import StreamFormat, stream_documents
+from ..utils.etag import build_etag, etag_matches, not_modified, set_etag_headers
 from ..models.speaker_note.sn_request_model import SNCreateRequest, SNUpdateRequest, SNDeleteByIdsRequest
+from ..configs.config import config
 
 router_speaker_note = APIRouter(prefix="/speaker_notes", tags=["speaker_notes"])
 
 # Create a speaker_note
 @router_speaker_note.post("/", response_model=BaseResponse)
-async def create_speaker_note(request: SNCreateRequest):
+async def create_speaker_note(request: SNCreateRequest, repository: SpeakerNoteRepository = Depends(get_speaker_note_repository)):
     """Create a new speaker note."""
-    from ..main import get_collection
-    collection = get_collection("SPEAKER_NOTES")
-    
     # Validate that we have data to process
     if not request.data:
         return BaseResponse.error("Data array is required", 400)
     
     try:
-        if collection is not None:
-            created_notes = []
+        created_notes = []
+        
+        # Reserve a block of id_note values for the whole batch in one round trip
+        next_id = await repository.allocate_ids(len(request.data))
+        
+        for speaker_note_create in request.data:
+            # Convert Pydantic model to dict for MongoDB
+            speaker_note_dump = speaker_note_create.model_dump()
             
-            # Get the highest id_note to continue the sequence
-            last_note = collection.find_one({}, sort=[("id_note", -1)])
-            next_id = (last_note["id_note"] + 1) if last_note and "id_note" in last_note else 1
+            # Add auto-incremented id_note and timestamps (local time)
+            current_time = datetime.now()  # Use local timezone
+            speaker_note_dump["id_note"] = next_id
+            speaker_note_dump["schema_version"] = "1.0.0"
+            speaker_note_dump["created_at"] = current_time
+            speaker_note_dump["updated_at"] = current_time
+            speaker_note_dump["preview"] = build_preview(speaker_note_dump["content"])
             
-            for speaker_note_create in request.data:
-                # Convert Pydantic model to dict for MongoDB
-                speaker_note_dump = speaker_note_create.model_dump()
-                
-                # Add auto-incremented id_note and timestamps (local time)
-                current_time = datetime.now()  # Use local timezone
-                speaker_note_dump["id_note"] = next_id
-                speaker_note_dump["schema_version"] = "1.0.0"
-                speaker_note_dump["created_at"] = current_time
-                speaker_note_dump["updated_at"] = current_time
-                
-                # Set default commands if not provided
-                if "commands" not in speaker_note_dump:
-                    speaker_note_dump["commands"] = []
-                
-                next_id += 1
-                
-                result = collection.insert_one(speaker_note_dump)
-                speaker_note_dump["_id"] = str(result.inserted_id)
-                created_notes.append(speaker_note_dump)
+            # Set default commands if not provided
+            if "commands" not in speaker_note_dump:
+                speaker_note_dump["commands"] = []
             
-            return BaseResponse.success(created_notes, "Speaker notes created successfully", 201)
-        return BaseResponse.error("No collection found", 500)
+            next_id += 1
+            created_notes.append(speaker_note_dump)
+        
+        # Write the whole batch with insert_many (chunked by MAX_INSERT_BATCH_SIZE)
+        await repository.insert(created_notes)
+        
+        return speaker_note_list_response(created_notes, "Speaker notes created successfully", 201)
     except Exception as e:
         return BaseResponse.error(f"Failed to create speaker notes: {str(e)}", 500)
 
 # Get all speaker notes or basic info
 @router_speaker_note.get("/", response_model=BaseResponse)
-async def get_speaker_notes():
-    """Get all speaker notes."""  
-    from ..main import get_collection
-    collection = get_collection("SPEAKER_NOTES")
-    if collection is not None:
-        try:
-            # Get all speaker notes and convert ObjectId to string
-            speaker_notes = list(collection.find({}))
-            for note in speaker_notes:
-                note["_id"] = str(note["_id"])
-            
-            return BaseResponse.success(speaker_notes, "Speaker notes retrieved successfully")
-        except Exception as e:
-            return BaseResponse.error(f"Failed to retrieve speaker notes: {str(e)}", 500)
-    return BaseResponse.error("No collection found", 500)
+async def get_speaker_notes(
+    request: Request,
+    limit: int = Query(config.DEFAULT_PAGE_SIZE, ge=1, le=config.MAX_PAGE_SIZE, description="Page size"),
+    after: Optional[str] = Query(None, description="Opaque cursor returned as next_cursor by the previous page"),
+    sort: Literal["asc", "desc"] = Query("desc", description="Order on (updated_at, id_note)"),
+    fetch_all: bool = Query(False, alias="all", description="Return every note in one unpaginated response"),
+    fields: Optional[str] = Query(None, description="Comma-separated list of fields to return"),
+    view: Literal["full", "summary"] = Query("full", description="summary returns id, title, timestamps and preview only"),
+    repository: SpeakerNoteRepository = Depends(get_speaker_note_repository)
+):
+    """Get speaker notes, one keyset page at a time."""
+    try:
+        # Conditional GET: the ETag comes from the notes collection version, not the payload
+        etag = build_etag("SPEAKER_NOTES", await repository.version(), request)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        
+        # Projection is pushed down to Mongo so unused content never leaves the database
+        projection = note_projection(fields, view)
+        if fetch_all:
+            # Legacy unpaginated listing, kept for the current frontend store
+            speaker_notes = await repository.find_all(projection)
+            next_cursor = None
+        else:
+            speaker_notes, next_cursor = await repository.find_page(limit, after, sort, projection)
+        
+        response = speaker_note_list_response(speaker_notes, "Speaker notes retrieved successfully", next_cursor=next_cursor)
+        set_etag_headers(response, etag)
+        return response
+    except ValueError as e:
+        return BaseResponse.error(str(e), 400)
+    except Exception as e:
+        return BaseResponse.error(f"Failed to retrieve speaker notes: {str(e)}", 500)
+
+# Stream all speaker notes (exports and large syncs)
+@router_speaker_note.get("/stream")
+async def stream_speaker_notes(
+    format: StreamFormat = Query("ndjson", description="ndjson (one note per line) or json (a single array)"),
+    fields: Optional[str] = Query(None, description="Comma-separated list of fields to return"),
+    view: Literal["full", "summary"] = Query("full", description="summary returns id, title, timestamps and preview only"),
+    repository: SpeakerNoteRepository = Depends(get_speaker_note_repository)
+):
+    """Stream every speaker note straight from the Mongo cursor."""
+    try:
+        projection = note_projection(fields, view)
+    except ValueError as e:
+        return BaseResponse.error(str(e), 400)
+    
+    return stream_documents(await repository.stream(projection), format)
 
 # Update speaker notes
 @router_speaker_note.put("/", response_model=BaseResponse)
-async def update_speaker_notes(request: SNUpdateRequest):
+async def update_speaker_notes(request: SNUpdateRequest, repository: SpeakerNoteRepository = Depends(get_speaker_note_repository)):
     """Update multiple speaker notes."""
-    from ..main import get_collection
-    collection = get_collection("SPEAKER_NOTES")
-    
     if not request.data:
         return BaseResponse.error("Data array is required", 400)
     
     try:
-        if collection is not None:
-            updated_notes = []
-            for speaker_note_update in request.data:
-                # id_note is guaranteed to exist because of SpeakerNoteUpdate model
-                id_note = speaker_note_update.id_note
-                
-                # Convert to dict and exclude None values and id_note
-                update_data = {k: v for k, v in speaker_note_update.model_dump(exclude={'id_note'}).items() if v is not None}
-                update_data["updated_at"] = datetime.now()  # Always update timestamp
-                
-                result = collection.update_one(
-                    {"id_note": id_note},
-                    {"$set": update_data}
-                )
-                
-                if result.matched_count == 0:
-                    return BaseResponse.error(f"Speaker note with id_note {id_note} not found", 404)
-                
-                # Get the updated document
-                updated_doc = collection.find_one({"id_note": id_note})
-                if updated_doc:
-                    updated_doc["_id"] = str(updated_doc["_id"])
-                    updated_notes.append(updated_doc)
+        updates = []
+        for speaker_note_update in request.data:
+            # id_note is guaranteed to exist because of SpeakerNoteUpdate model
+            id_note = speaker_note_update.id_note
             
-            return BaseResponse.success(updated_notes, "Speaker notes updated successfully")
-        return BaseResponse.error("No collection found", 500)
+            # Convert to dict and exclude None values and id_note
+            update_data = {k: v for k, v in speaker_note_update.model_dump(exclude={'id_note'}).items() if v is not None}
+            update_data["updated_at"] = datetime.now()  # Always update timestamp
+            if "content" in update_data:
+                update_data["preview"] = build_preview(update_data["content"])
+            updates.append((id_note, update_data))
+        
+        # Send every $set in one round trip, then fetch the post-images in one query
+        updated_notes, not_found_ids = await repository.update(updates)
+        
+        if not_found_ids:
+            if len(not_found_ids) == 1:
+                return BaseResponse.error(f"Speaker note with id_note {not_found_ids[0]} not found", 404, updated_notes)
+            return BaseResponse.error(f"Speaker notes with id_note {not_found_ids} not found", 404, updated_notes)
+        
+        return speaker_note_list_response(updated_notes, "Speaker notes updated successfully")
     except Exception as e:
         return BaseResponse.error(f"Failed to update speaker notes: {str(e)}", 500)
 
 # Delete multiple speaker notes by IDs
 @router_speaker_note.delete("/ids", response_model=BaseResponse)
-async def delete_speaker_notes_by_ids(request: SNDeleteByIdsRequest):
+async def delete_speaker_notes_by_ids(request: SNDeleteByIdsRequest, repository: SpeakerNoteRepository = Depends(get_speaker_note_repository)):
     """Delete multiple speaker notes by their IDs."""
-    from ..main import get_collection
-    collection = get_collection("SPEAKER_NOTES")
-    
     if not request.ids_note:
         return BaseResponse.error("ids_note array is required", 400)
     
     try:
-        if collection is not None:
-            result = collection.delete_many({"id_note": {"$in": request.ids_note}})
-            
-            return BaseResponse.success(
-                {"deleted_count": result.deleted_count}, 
-                f"Speaker notes with ids {request.ids_note} deleted successfully. {result.deleted_count} notes removed."
-            )
-        return BaseResponse.error("No collection found", 500)
+        deleted_count = await repository.delete_by_ids(request.ids_note)
+        
+        return BaseResponse.success(
+            {"deleted_count": deleted_count}, 
+            f"Speaker notes with ids {request.ids_note} deleted successfully. {deleted_count} notes removed."
+        )
     except Exception as e:
         return BaseResponse.error(f"Failed to delete speaker notes: {str(e)}", 500)
 
 # Delete a specific speaker note
 @router_speaker_note.delete("/{id_note}", response_model=BaseResponse)
-async def delete_speaker_note(id_note: int):
+async def delete_speaker_note(id_note: int, repository: SpeakerNoteRepository = Depends(get_speaker_note_repository)):
     """Delete a specific speaker note by ID."""
-    from ..main import get_collection
-    collection = get_collection("SPEAKER_NOTES")
-    
     try:
-        if collection is not None:
-            result = collection.delete_one({"id_note": id_note})
-            
-            if result.deleted_count == 0:
-                return BaseResponse.error("Speaker note not found", 404)
+        if await repository.delete_by_id(id_note) == 0:
+            return BaseResponse.error("Speaker note not found", 404)
 
-            return BaseResponse.success({"deleted_id_note": id_note}, f"Speaker note with id {id_note} deleted successfully")
-        return BaseResponse.error("No collection found", 500)
+        return BaseResponse.success({"deleted_id_note": id_note}, f"Speaker note with id {id_note} deleted successfully")
     except Exception as e:
         return BaseResponse.error(f"Failed to delete speaker note: {str(e)}", 500)
 
 # Delete all speaker notes
 @router_speaker_note.delete("/", response_model=BaseResponse)
-async def delete_all_speaker_notes():
+async def delete_all_speaker_notes(repository: SpeakerNoteRepository = Depends(get_speaker_note_repository)):
     """Delete all speaker notes."""
-    from ..main import get_collection
-    collection = get_collection("SPEAKER_NOTES")
-    
     try:
-        if collection is not None:
-            result = collection.delete_many({})
-            
-            return BaseResponse.success(
-                {"deleted_count": result.deleted_count}, 
-                f"All speaker notes deleted successfully. {result.deleted_count} notes removed."
-            )
-        return BaseResponse.error("No collection found", 500)
+        deleted_count = await repository.delete_all()
+        
+        return BaseResponse.success(
+            {"deleted_count": deleted_count}, 
+            f"All speaker notes deleted successfully. {deleted_count} notes removed."
+        )
     except Exception as e:
         return BaseResponse.error(f"Failed to delete all speaker notes: {str(e)}", 500)
\ No newline at end of file
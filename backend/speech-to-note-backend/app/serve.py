@@ -0,0 +1,74 @@
+import argparse
+import math
+import os
+from typing import Optional
+
+import uvicorn
+
+from .configs.config import config
+
+# cgroup v2 exposes "<quota> <period>" in cpu.max, cgroup v1 splits them in two files
+CGROUP_V2_CPU_MAX = "/sys/fs/cgroup/cpu.max"
+CGROUP_V1_CPU_QUOTA = "/sys/fs/cgroup/cpu/cpu.cfs_quota_us"
+CGROUP_V1_CPU_PERIOD = "/sys/fs/cgroup/cpu/cpu.cfs_period_us"
+
+def _read(path: str) -> Optional[str]:
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+def cgroup_cpu_limit() -> Optional[float]:
+    """CPU limit of the container in cores (e.g. 0.5 for 500m), None when unlimited"""
+    cpu_max = _read(CGROUP_V2_CPU_MAX)
+    if cpu_max:
+        quota, period = cpu_max.split()[:2]
+        if quota != "max":
+            return int(quota) / int(period)
+        return None
+
+    quota, period = _read(CGROUP_V1_CPU_QUOTA), _read(CGROUP_V1_CPU_PERIOD)
+    if quota and period and int(quota) > 0:
+        return int(quota) / int(period)
+    return None
+
+def worker_count() -> int:
+    """One event-loop worker per whole CPU the container may use, at least one"""
+    if config.SERVER_WORKERS:
+        return config.SERVER_WORKERS
+    cpus = os.cpu_count() or 1
+    limit = cgroup_cpu_limit()
+    if limit is not None:
+        cpus = min(cpus, limit)
+    return max(1, math.floor(cpus))
+
+def serve(mode: str, host: str = config.SERVER_HOST, port: int = config.SERVER_PORT):
+    if mode == "dev":
+        print("[SERVE] 🛠️ Dev mode: single worker with auto-reload", flush=True)
+        uvicorn.run("app.main:app", host=host, port=port, reload=True)
+        return
+
+    workers = worker_count()
+    print(f"[SERVE] 🚀 Production mode: {workers} worker(s), uvloop + httptools (CPU limit: {cgroup_cpu_limit() or 'none'})", flush=True)
+    uvicorn.run(
+        "app.main:app",
+        host=host,
+        port=port,
+        workers=workers,
+        loop="uvloop",
+        http="httptools",
+        timeout_keep_alive=config.SERVER_KEEP_ALIVE_SECONDS,
+        backlog=config.SERVER_BACKLOG,
+        access_log=config.SERVER_ACCESS_LOG,
+        proxy_headers=config.SERVER_FORWARDED_ALLOW_IPS is not None,
+        forwarded_allow_ips=config.SERVER_FORWARDED_ALLOW_IPS
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the SpeechToNote API")
+    parser.add_argument("--mode", choices=["dev", "production"], default=config.SERVER_MODE, help="Defaults to SERVER_MODE (derived from CURRENT_ENV)")
+    parser.add_argument("--host", default=config.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=config.SERVER_PORT)
+    args = parser.parse_args()
+    serve(args.mode, args.host, args.port)
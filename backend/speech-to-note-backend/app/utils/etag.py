@@ -0,0 +1,35 @@
+import hashlib
+
+from fastapi import Request, Response
+
+from ..configs.config import config
+
+def build_etag(collection_name: str, version: int, request: Request) -> str:
+    """Strong ETag derived from the collection version and the query parameters (never the payload).
+
+    The application and schema versions are hashed in too, so a deploy that
+    changes the response shape does not answer 304 with a body of the old shape.
+    """
+    query = "&".join(f"{key}={value}" for key, value in sorted(request.query_params.multi_items()))
+    release = f"{config.CURRENT_APPLICATION_VERSION}/{config.CURRENT_SN_SCHEMA_VERSION}/{config.CURRENT_SC_SCHEMA_VERSION}"
+    digest = hashlib.sha1(f"{release}?{query}".encode()).hexdigest()[:12]
+    return f'"{collection_name.lower()}-v{version}-{digest}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check the If-None-Match header against etag"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+def set_etag_headers(response: Response, etag: str):
+    # no-cache: browsers keep the body but revalidate with If-None-Match on every fetch
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+
+def not_modified(etag: str) -> Response:
+    """Empty 304 answer, nothing is serialized"""
+    response = Response(status_code=304)
+    set_etag_headers(response, etag)
+    return response
@@ -0,0 +1,58 @@
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Literal
+
+from bson import ObjectId
+from fastapi.responses import StreamingResponse
+
+from ..configs.config import config
+
+StreamFormat = Literal["ndjson", "json"]
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "json": "application/json",
+}
+
+def _json_default(value: Any):
+    """Encode the BSON types found in our documents"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def encode_document(doc: dict) -> str:
+    return json.dumps(doc, default=_json_default, ensure_ascii=False)
+
+async def iter_cursor(cursor, stream_format: StreamFormat = "ndjson", batch_size: int = None) -> AsyncIterator[bytes]:
+    """Serialize a Mongo cursor batch by batch, so memory stays bounded by batch_size"""
+    batch_size = batch_size or config.STREAM_BATCH_SIZE
+    separator = "\n" if stream_format == "ndjson" else ","
+    batch = []
+    first_chunk = True
+
+    if stream_format == "json":
+        yield b"["
+    async for doc in cursor:
+        batch.append(encode_document(doc))
+        if len(batch) >= batch_size:
+            yield _join_batch(batch, separator, stream_format, first_chunk)
+            batch = []
+            first_chunk = False
+    if batch:
+        yield _join_batch(batch, separator, stream_format, first_chunk)
+    if stream_format == "json":
+        yield b"]"
+
+def _join_batch(batch: list, separator: str, stream_format: StreamFormat, first_chunk: bool) -> bytes:
+    chunk = separator.join(batch)
+    if stream_format == "ndjson":
+        chunk += "\n"
+    elif not first_chunk:
+        chunk = "," + chunk
+    return chunk.encode()
+
+def stream_documents(cursor, stream_format: StreamFormat = "ndjson") -> StreamingResponse:
+    """Wrap a Mongo cursor in a StreamingResponse"""
+    return StreamingResponse(iter_cursor(cursor, stream_format), media_type=MEDIA_TYPES[stream_format])
@@ -0,0 +1,91 @@
+"""
+Concurrency benchmark for the SpeechToNote API.
+
+Spawns N parallel clients against a running server and reports latency
+percentiles. Run it once against the previous build and once against the
+current one to compare p99 latency:
+
+    uv run python -m benchmarks.concurrency_benchmark --url http://127.0.0.1:8000 --clients 200 --label after
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Dict, List
+
+import httpx
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Return the pct-th percentile (nearest-rank) of values"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+async def run_client(client: httpx.AsyncClient, client_id: int, requests_per_client: int, latencies: List[float], errors: List[str]):
+    """Simulate one dictation session: create a note, autosave it, list notes"""
+    for i in range(requests_per_client):
+        try:
+            start = time.perf_counter()
+            if i % 3 == 0:
+                response = await client.post("/speaker_notes/", json={
+                    "data": [{"title": f"bench-{client_id}-{i}", "content": "benchmark content " * 20, "commands": []}]
+                })
+            elif i % 3 == 1:
+                response = await client.get("/speaker_commands/", params={"all": True})
+            else:
+                response = await client.get("/speaker_notes/")
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code != 200:
+                errors.append(f"HTTP {response.status_code}")
+        except Exception as e:
+            errors.append(str(e))
+
+
+async def run_benchmark(url: str, clients: int, requests_per_client: int) -> Dict[str, float]:
+    """Run all clients concurrently and aggregate latency statistics"""
+    latencies: List[float] = []
+    errors: List[str] = []
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            run_client(client, client_id, requests_per_client, latencies, errors)
+            for client_id in range(clients)
+        ))
+        elapsed = time.perf_counter() - start
+
+    return {
+        "clients": clients,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "elapsed_s": round(elapsed, 3),
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "mean_ms": round(statistics.fmean(latencies), 2) if latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SpeechToNote API concurrency benchmark")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Base URL of the running API")
+    parser.add_argument("--clients", type=int, default=200, help="Number of parallel clients")
+    parser.add_argument("--requests", type=int, default=30, help="Requests issued by each client")
+    parser.add_argument("--label", default="run", help="Label printed with the results (e.g. before/after)")
+    args = parser.parse_args()
+
+    print(f"🏁 Benchmarking {args.url} with {args.clients} clients x {args.requests} requests...")
+    results = asyncio.run(run_benchmark(args.url, args.clients, args.requests))
+    results["label"] = args.label
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
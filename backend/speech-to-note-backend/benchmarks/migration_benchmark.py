@@ -0,0 +1,73 @@
+"""
+Migration benchmark: time the startup migrations on a large fixture of old-schema documents.
+
+Fills a scratch database with N speaker commands split between unversioned and
+1.0.0 documents (string command_vocal), then times run_migrations:
+
+    uv run python -m benchmarks.migration_benchmark --documents 1000000
+"""
+import argparse
+import asyncio
+import time
+
+from pymongo import AsyncMongoClient
+
+from app.configs.config import config
+from app.configs.indexes import INDEXES
+from app.database.indexes import reconcile_collection_indexes
+from app.migrations.speaker_command_migrations import SpeakerCommandMigrations
+
+
+def build_commands(start: int, count: int) -> list:
+    """Old-schema commands: half without schema_version, half at 1.0.0"""
+    commands = []
+    for i in range(start, start + count):
+        command = {"id_command": i, "command_name": f"cmd-{i}", "command_vocal": f"commande {i}"}
+        if i % 2:
+            command["schema_version"] = "1.0.0"
+        commands.append(command)
+    return commands
+
+
+async def load_fixture(collection, documents: int, batch_size: int):
+    await collection.drop()
+    await reconcile_collection_indexes(collection, INDEXES["COMMANDS"])
+    for start in range(0, documents, batch_size):
+        await collection.insert_many(build_commands(start, min(batch_size, documents - start)), ordered=False)
+
+
+async def run(documents: int, batch_size: int, keep: bool):
+    client = AsyncMongoClient(config.MONGO_URI)
+    database = client[f"{config.DATABASE_NAME}_migration_bench"]
+    collection = database["COMMANDS"]
+    try:
+        print(f"📦 Loading {documents} old-schema commands...")
+        start = time.perf_counter()
+        await load_fixture(collection, documents, batch_size)
+        print(f"  fixture ready in {time.perf_counter() - start:.1f} s")
+
+        start = time.perf_counter()
+        updated_count = await SpeakerCommandMigrations.run_migrations(collection)
+        elapsed = time.perf_counter() - start
+        print(f"⏱️ run_migrations: {updated_count} documents in {elapsed:.1f} s ({updated_count / elapsed:,.0f} docs/s)")
+
+        start = time.perf_counter()
+        await SpeakerCommandMigrations.run_migrations(collection)
+        print(f"⏱️ run_migrations with nothing to do: {(time.perf_counter() - start) * 1000:.1f} ms")
+    finally:
+        if not keep:
+            await client.drop_database(database.name)
+        await client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup migration benchmark")
+    parser.add_argument("--documents", type=int, default=1_000_000, help="Number of old-schema documents")
+    parser.add_argument("--batch-size", type=int, default=10_000, help="insert_many batch size for the fixture")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch database afterwards")
+    args = parser.parse_args()
+    asyncio.run(run(args.documents, args.batch_size, args.keep))
+
+
+if __name__ == "__main__":
+    main()
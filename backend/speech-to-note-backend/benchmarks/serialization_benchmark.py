@@ -0,0 +1,79 @@
+"""
+Serialization micro-benchmark: generic BaseResponse path vs precompiled TypeAdapter path.
+
+Serializes a list of synthetic notes the way FastAPI does for response_model=BaseResponse
+(validation + jsonable_encoder + json.dumps) and through FastJSONResponse:
+
+    uv run python -m benchmarks.serialization_benchmark --notes 10000
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.models.response.base_response_model import BaseResponse
+from app.models.response.fast_response_model import speaker_note_list_response
+
+
+def build_notes(count: int) -> list:
+    """Synthetic notes shaped like the documents returned by Mongo"""
+    now = datetime.now()
+    return [
+        {
+            "_id": str(ObjectId()),
+            "id_note": i,
+            "title": f"Note {i}",
+            "content": "Contenu dicté " * 40,
+            "preview": "Contenu dicté " * 10,
+            "commands": ["titre", "saut de ligne"],
+            "schema_version": "1.0.0",
+            "created_at": now - timedelta(minutes=i),
+            "updated_at": now - timedelta(seconds=i),
+        }
+        for i in range(count)
+    ]
+
+
+def time_it(func, repeat: int) -> float:
+    """Best wall time in milliseconds over repeat runs"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Response serialization micro-benchmark")
+    parser.add_argument("--notes", type=int, default=10000, help="Number of notes in the response")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per variant (best is reported)")
+    args = parser.parse_args()
+
+    notes = build_notes(args.notes)
+    field = create_model_field(name="Response_get_speaker_notes", type_=BaseResponse, mode="serialization")
+
+    def generic_path():
+        content = BaseResponse.success(notes, "Speaker notes retrieved successfully")
+        encoded = asyncio.run(serialize_response(field=field, response_content=content))
+        return JSONResponse(encoded).body
+
+    def fast_path():
+        return speaker_note_list_response(notes, "Speaker notes retrieved successfully").body
+
+    generic_ms = time_it(generic_path, args.repeat)
+    fast_ms = time_it(fast_path, args.repeat)
+
+    print(f"📏 Serializing {args.notes} notes (best of {args.repeat})")
+    print(f"  BaseResponse + jsonable_encoder: {generic_ms:.1f} ms")
+    print(f"  FastJSONResponse (TypeAdapter):  {fast_ms:.1f} ms")
+    print(f"  Speed-up: x{generic_ms / fast_ms:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,12 @@
 import pytest
 from fastapi.testclient import TestClient
 from pymongo import MongoClient
-from app.main import app
+from app.main import create_app
 from app.configs.config import config
 
 # Test database configuration
 TEST_DATABASE_NAME = f"{config.DATABASE_NAME}_test"
-TEST_COLLECTIONS = ["SPEAKER_NOTES_TEST", "COMMANDS_TEST"]
+TEST_COLLECTIONS = ["SPEAKER_NOTES_TEST", "COMMANDS_TEST", "COUNTERS_TEST", "MIGRATIONS_TEST"]
 
 @pytest.fixture(scope="session")
 def test_db():
@@ -24,22 +24,13 @@ def test_db():
     finally:
         test_client.close()
 
-@pytest.fixture(autouse=True)
-def mock_get_collection(mocker, test_db):
-    """Mock the get_collection function to use test collections"""
-    def mock_get_collection_func(collection_name: str = "SPEAKER_NOTES"):
-        collection_map = {
-            "SPEAKER_NOTES": "SPEAKER_NOTES_TEST",
-            "COMMANDS": "COMMANDS_TEST"
-        }
-        test_collection_name = collection_map.get(collection_name, f"{collection_name}_TEST")
-        return test_db[test_collection_name]
-    
-    mocker.patch("app.main.get_collection", side_effect=mock_get_collection_func)
-
 @pytest.fixture
 def test_client():
-    """Create a test client for the FastAPI app"""
+    """Create a test client for an app instance bound to the test collections"""
+    app = create_app(
+        database_name=TEST_DATABASE_NAME,
+        collection_names={name: f"{name}_TEST" for name in config.COLLECTIONS}
+    )
     with TestClient(app) as client:
         yield client
 
@@ -0,0 +1,63 @@
+from fastapi.testclient import TestClient
+
+from app.configs.indexes import INDEXES
+
+class TestIndexes:
+    """Test class for the index registry reconciliation"""
+    
+    def test_reconcile_indexes_is_idempotent(self, test_client: TestClient, test_db):
+        """Test that reconciling twice creates the indexes once and then reports no changes"""
+        from app.database.indexes import reconcile_indexes
+        
+        collections = test_client.app.state.collections
+        for collection_name in INDEXES:
+            test_db[f"{collection_name}_TEST"].drop()
+        
+        first_report = test_client.portal.call(reconcile_indexes, collections)
+        for collection_name, wanted_indexes in INDEXES.items():
+            assert sorted(first_report[collection_name]["created"]) == sorted(index["name"] for index in wanted_indexes)
+            existing = test_db[f"{collection_name}_TEST"].index_information()
+            assert all(index["name"] in existing for index in wanted_indexes)
+        
+        second_report = test_client.portal.call(reconcile_indexes, collections)
+        for collection_name in INDEXES:
+            assert second_report[collection_name]["created"] == []
+            assert second_report[collection_name]["dropped"] == []
+    
+    def test_reconcile_indexes_drops_unknown(self, test_client: TestClient, test_db):
+        """Test that indexes missing from the registry are dropped when asked to"""
+        from app.database.indexes import reconcile_indexes
+        
+        test_db["SPEAKER_NOTES_TEST"].create_index("title", name="title_1")
+        
+        report = test_client.portal.call(reconcile_indexes, test_client.app.state.collections, INDEXES, True)
+        
+        assert "title_1" in report["SPEAKER_NOTES"]["dropped"]
+        assert "title_1" not in test_db["SPEAKER_NOTES_TEST"].index_information()
+    
+    def test_reconcile_indexes_keeps_unknown_by_default(self, test_client: TestClient, test_db):
+        """Test that the default (startup) reconcile never drops an index created by hand"""
+        from app.database.indexes import reconcile_indexes
+        
+        test_db["SPEAKER_NOTES_TEST"].create_index("title", name="title_1")
+        
+        report = test_client.portal.call(reconcile_indexes, test_client.app.state.collections)
+        
+        assert report["SPEAKER_NOTES"]["dropped"] == []
+        assert "title_1" in test_db["SPEAKER_NOTES_TEST"].index_information()
+        test_db["SPEAKER_NOTES_TEST"].drop_index("title_1")
+    
+    def test_startup_indexes_the_mapped_collections(self, test_client: TestClient, test_db):
+        """Test that the registry indexes exist on the *_TEST collections the app actually uses"""
+        for collection_name, wanted_indexes in INDEXES.items():
+            existing = test_db[f"{collection_name}_TEST"].index_information()
+            assert all(index["name"] in existing for index in wanted_indexes)
+    
+    def test_hot_queries_use_index_scan(self, test_client: TestClient, test_db):
+        """Test that hot queries are index-backed once indexes are reconciled"""
+        from app.database.indexes import reconcile_indexes, verify_hot_queries
+        
+        collections = test_client.app.state.collections
+        test_client.portal.call(reconcile_indexes, collections)
+        
+        assert test_client.portal.call(verify_hot_queries, collections) == []
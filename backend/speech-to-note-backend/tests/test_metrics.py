@@ -0,0 +1,28 @@
+from fastapi.testclient import TestClient
+from app.configs.config import config
+
+class TestMetrics:
+    """Test class for the connection pool metrics"""
+    
+    def test_pool_metrics_after_warm_up(self, test_client: TestClient):
+        """Test that the pool is warmed up and checkouts are counted"""
+        test_client.get("/speaker_notes/")
+        
+        response = test_client.get("/metrics/pool")
+        
+        assert response.status_code == 200
+        metrics = response.json()["data"]
+        if config.MONGO_WARM_UP_POOL:
+            assert metrics["open"] >= config.MONGO_MIN_POOL_SIZE
+        assert metrics["checkouts"] > 0
+        assert metrics["in_use"] >= 0
+        assert metrics["checkout_timeouts"] == 0
+    
+    def test_prometheus_export(self, test_client: TestClient):
+        """Test that the Prometheus endpoint exposes the pool gauges at /metrics (the default scrape path)"""
+        response = test_client.get("/metrics", follow_redirects=False)
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert "mongo_pool_in_use " in response.text
+        assert "mongo_pool_checkouts_total " in response.text
@@ -0,0 +1,148 @@
+import time
+from datetime import datetime
+from fastapi.testclient import TestClient
+import pytest
+
+class TestMigrate:
+    """Test class for the migration runner and its distributed lock"""
+    
+    def test_lock_is_exclusive(self, test_client: TestClient):
+        """Test that a second owner cannot take a held lock until it is released"""
+        from app.database.locks import DistributedLock
+        
+        collection = test_client.app.state.collections["MIGRATIONS"]
+        first = DistributedLock(collection, "test_lock", owner="pod-a")
+        second = DistributedLock(collection, "test_lock", owner="pod-b")
+        
+        assert test_client.portal.call(first.try_acquire) is True
+        assert test_client.portal.call(second.try_acquire) is False
+        
+        test_client.portal.call(first.release)
+        assert test_client.portal.call(second.try_acquire) is True
+        test_client.portal.call(second.release)
+    
+    def test_expired_lock_is_taken_over(self, test_client: TestClient, test_db):
+        """Test that a lock whose lease expired (crashed holder) can be acquired"""
+        from app.database.locks import DistributedLock
+        
+        test_db["MIGRATIONS_TEST"].insert_one({"_id": "test_lock", "owner": "crashed-pod", "expires_at": datetime(2000, 1, 1)})
+        lock = DistributedLock(test_client.app.state.collections["MIGRATIONS"], "test_lock", owner="pod-a")
+        
+        assert test_client.portal.call(lock.try_acquire) is True
+        test_client.portal.call(lock.release)
+    
+    def test_migrate_records_schema_versions(self, test_client: TestClient):
+        """Test that a migration run records the schema versions checked at startup"""
+        from app.migrations.runner import migrate_with_lock, stale_schemas
+        
+        collections = test_client.app.state.collections
+        test_client.portal.call(collections["MIGRATIONS"].delete_many, {})
+        assert sorted(test_client.portal.call(stale_schemas, collections)) == ["COMMANDS", "SPEAKER_NOTES"]
+        
+        test_client.portal.call(migrate_with_lock, collections)
+        
+        assert test_client.portal.call(stale_schemas, collections) == []
+    
+    def test_migrate_skips_when_locked(self, test_client: TestClient):
+        """Test that a runner that does not wait skips while another one holds the lock"""
+        from app.database.locks import DistributedLock
+        from app.migrations.runner import LOCK_NAME, migrate_with_lock
+        
+        collections = test_client.app.state.collections
+        holder = DistributedLock(collections["MIGRATIONS"], LOCK_NAME, owner="other-pod")
+        test_client.portal.call(holder.try_acquire)
+        
+        assert test_client.portal.call(migrate_with_lock, collections, False) == {}
+        test_client.portal.call(holder.release)
+    
+    def test_migration_stops_when_lock_is_lost(self, test_client: TestClient, test_db):
+        """Test that a runner whose lease was taken over stops before the next batch"""
+        from app.database.locks import DistributedLock, LockLostError
+        from app.migrations.speaker_command_migrations import SpeakerCommandMigrations
+        
+        test_db["COMMANDS_TEST"].insert_many([
+            {"id_command": 900 + i, "command_name": f"old_{i}", "command_vocal": f"ancienne {i}", "schema_version": "1.0.0"}
+            for i in range(3)
+        ])
+        collections = test_client.app.state.collections
+        lock = DistributedLock(collections["MIGRATIONS"], "lost_lock_test", ttl_seconds=0.3)
+        test_client.portal.call(lock.try_acquire)
+        
+        # Another runner takes the lock over; the next renewal notices it
+        test_db["MIGRATIONS_TEST"].update_one({"_id": "lost_lock_test"}, {"$set": {"owner": "other-pod"}})
+        time.sleep(0.3)
+        
+        assert lock.lost
+        with pytest.raises(LockLostError):
+            test_client.portal.call(SpeakerCommandMigrations.run_migrations, collections["COMMANDS"], collections["MIGRATIONS"], 2, 0, lock)
+        assert test_db["COMMANDS_TEST"].count_documents({"schema_version": "1.0.0"}) == 3
+    
+    def test_batched_migration_resumes_from_checkpoint(self, test_client: TestClient, test_db):
+        """Test that a batched run skips documents before the checkpoint and clears it when done"""
+        from app.migrations.speaker_command_migrations import SpeakerCommandMigrations
+        
+        test_db["COMMANDS_TEST"].insert_many([
+            {"id_command": 900 + i, "command_name": f"old_{i}", "command_vocal": f"ancienne {i}", "schema_version": "1.0.0"}
+            for i in range(5)
+        ])
+        old_ids = [doc["_id"] for doc in test_db["COMMANDS_TEST"].find({"schema_version": "1.0.0"}).sort("_id", 1)]
+        
+        # Simulate a runner killed after the first two documents
+        test_db["MIGRATIONS_TEST"].insert_one({"_id": "checkpoint_COMMANDS_TEST", "last_id": old_ids[1], "target_version": "1.0.1"})
+        
+        collections = test_client.app.state.collections
+        updated_count = test_client.portal.call(SpeakerCommandMigrations.run_migrations, collections["COMMANDS"], collections["MIGRATIONS"], 2, 0)
+        
+        assert updated_count == 3
+        assert test_db["COMMANDS_TEST"].count_documents({"_id": {"$in": old_ids[:2]}, "schema_version": "1.0.0"}) == 2
+        assert test_db["COMMANDS_TEST"].count_documents({"_id": {"$in": old_ids[2:]}, "schema_version": "1.0.1"}) == 3
+        assert test_db["MIGRATIONS_TEST"].find_one({"_id": "checkpoint_COMMANDS_TEST"}) is None
+    
+    def test_lazy_upgrade_on_read(self, test_client: TestClient, test_db):
+        """Test that an old document is served upgraded and written back by the flush"""
+        test_db["COMMANDS_TEST"].insert_one({"id_command": 950, "command_name": "lazy", "command_vocal": "paresseux", "schema_version": "1.0.0"})
+        
+        response = test_client.get("/speaker_commands/", params={"all": True})
+        
+        served = next(cmd for cmd in response.json()["data"] if cmd["id_command"] == 950)
+        assert served["schema_version"] == "1.0.1"
+        assert served["command_vocal"] == ["paresseux"]
+        
+        upgrader = test_client.app.state.speaker_commands.upgrader
+        test_client.portal.call(upgrader.flush)
+        stored = test_db["COMMANDS_TEST"].find_one({"id_command": 950})
+        assert stored["schema_version"] == "1.0.1"
+        assert stored["command_vocal"] == ["paresseux"]
+    
+    def test_lazy_upgrade_keeps_served_timestamps(self, test_client: TestClient, test_db):
+        """Test that the written-back updated_at is the one served, so keyset cursors stay valid"""
+        edited_at = datetime(2024, 5, 1, 12, 30)
+        test_db["COMMANDS_TEST"].insert_many([
+            {"id_command": 951, "command_name": "dated", "command_vocal": "daté", "schema_version": "1.0.0", "created_at": edited_at, "updated_at": edited_at},
+            {"id_command": 952, "command_name": "undated", "command_vocal": "sans date", "schema_version": "1.0.0"},
+        ])
+        
+        served = {cmd["id_command"]: cmd for cmd in test_client.get("/speaker_commands/", params={"all": True}).json()["data"]}
+        test_client.portal.call(test_client.app.state.speaker_commands.upgrader.flush)
+        
+        for id_command in (951, 952):
+            stored = test_db["COMMANDS_TEST"].find_one({"id_command": id_command})
+            assert stored["schema_version"] == "1.0.1"
+            assert datetime.fromisoformat(served[id_command]["updated_at"]) == stored["updated_at"]
+        assert test_db["COMMANDS_TEST"].find_one({"id_command": 951})["updated_at"] == edited_at
+    
+    def test_registry_orders_versions_numerically(self):
+        """Test that the registry compares parsed versions and picks the shortest chain"""
+        from app.migrations.registry import Migration, MigrationRegistry
+        
+        def step(version):
+            return Migration(*version, lambda collection, doc: {}, lambda: [{"$set": {"schema_version": version[1]}}])
+        
+        registry = MigrationRegistry([step(("1.0.0", "1.0.9")), step(("1.0.9", "1.0.10")), step(("1.0.0", "1.0.10")), step(("1.0.10", "1.1.0"))])
+        
+        assert registry.is_older("1.0.9", "1.0.10")
+        assert not registry.is_older("1.0.10", "1.0.9")
+        assert [(m.from_version, m.to_version) for m in registry.chain("1.0.0", "1.1.0")] == [("1.0.0", "1.0.10"), ("1.0.10", "1.1.0")]
+        assert [(m.from_version, m.to_version) for m in registry.chain("1.0.9", "1.0.10")] == [("1.0.9", "1.0.10")]
+        assert registry.chain("1.1.0", "1.1.0") == []
+        assert registry.pipeline("1.0.9", "1.1.0") == [{"$set": {"schema_version": "1.0.10"}}, {"$set": {"schema_version": "1.1.0"}}]
@@ -1,3 +1,4 @@
+from datetime import datetime
 from fastapi.testclient import TestClient
 import json
 
@@ -37,13 +38,12 @@ class TestSpeakerCommand:
         assert "updated_at" in created_command
         assert created_command["schema_version"] == "1.0.1"
 
-    def test_migration_from_old_schema(self, test_client: TestClient):
+    def test_migration_from_old_schema(self, test_client: TestClient, test_db):
         """Test that old schema documents are migrated when retrieved"""
         from app.migrations.speaker_command_migrations import SpeakerCommandMigrations
-        from app.main import get_collection
 
         # Insert an old schema document directly
-        collection = get_collection("COMMANDS")
+        collection = test_client.app.state.collections["COMMANDS"]
         if collection is not None:
             old_doc = {
                 "id_command": 999,
@@ -52,10 +52,10 @@ class TestSpeakerCommand:
                 "command_description": "Old format command",
                 "schema_version": "1.0.0"  # Old version
             }
-            collection.insert_one(old_doc)
+            test_db["COMMANDS_TEST"].insert_one(old_doc)
             
-            # Manually run migration before retrieving
-            SpeakerCommandMigrations.run_migrations(collection)
+            # Manually run migration before retrieving (on the app event loop)
+            test_client.portal.call(SpeakerCommandMigrations.run_migrations, collection)
             
             # Retrieve all commands - should show migrated data
             response = test_client.get("/speaker_commands/")
@@ -79,6 +79,32 @@ class TestSpeakerCommand:
             assert "html_tag_end" in migrated_command
             assert migrated_command["html_tag_end"] == ""  # Should be empty string from migration
 
+    def test_migration_groups_source_versions(self, test_client: TestClient, test_db):
+        """Test that unversioned and 1.0.0 documents are both migrated server-side"""
+        from app.migrations.speaker_command_migrations import SpeakerCommandMigrations
+        
+        test_db["COMMANDS_TEST"].insert_many([
+            {"id_command": 997, "command_name": "unversioned", "command_vocal": "sans version"},
+            {"id_command": 998, "command_name": "v1_0_0", "command_vocal": ["déjà liste"], "schema_version": "1.0.0"},
+        ])
+        
+        collection = test_client.app.state.collections["COMMANDS"]
+        updated_count = test_client.portal.call(SpeakerCommandMigrations.run_migrations, collection)
+        
+        assert updated_count == 2
+        unversioned = test_db["COMMANDS_TEST"].find_one({"id_command": 997})
+        assert unversioned["schema_version"] == "1.0.1"
+        assert unversioned["command_vocal"] == ["sans version"]
+        assert unversioned["command_description"] is None
+        assert "created_at" in unversioned
+        already_list = test_db["COMMANDS_TEST"].find_one({"id_command": 998})
+        assert already_list["schema_version"] == "1.0.1"
+        assert already_list["command_vocal"] == ["déjà liste"]
+        assert already_list["html_tag_end"] == ""
+        
+        # Nothing left to migrate on a second run
+        assert test_client.portal.call(SpeakerCommandMigrations.run_migrations, collection) == 0
+
     def test_create_speaker_command_without_html_tags(self, test_client: TestClient):
         """Test creating speaker command without HTML tags"""
         test_data = {
@@ -163,6 +189,20 @@ class TestSpeakerCommand:
         assert response_data["status_code"] == 400
         assert "must contain at least one non-empty vocal command" in response_data["message"]
     
+    def test_create_speaker_commands_invalid_item_writes_nothing(self, test_client: TestClient):
+        """Test that one invalid item rejects the whole batch before anything is written"""
+        test_data = {
+            "data": [
+                {"command_name": "valid", "command_vocal": ["valide"]},
+                {"command_name": "invalid", "command_vocal": [" "]}
+            ]
+        }
+        
+        response = test_client.post("/speaker_commands/", json=test_data)
+        
+        assert response.json()["status_code"] == 400
+        assert test_client.get("/speaker_commands/").json()["data"] == []
+    
     def test_create_multiple_speaker_commands(self, test_client: TestClient):
         """Test creating multiple speaker commands"""
         test_data = {
@@ -254,6 +294,75 @@ class TestSpeakerCommand:
         assert response_data["message"] == "Speaker commands retrieved successfully"
         assert len(response_data["data"]) == 2
     
+    def test_stream_speaker_commands_json_array(self, test_client: TestClient):
+        """Test streaming commands as a single JSON array"""
+        test_data = {
+            "data": [
+                {"command_name": "command_1", "command_vocal": ["première"]},
+                {"command_name": "command_2", "command_vocal": ["deuxième"]}
+            ]
+        }
+        test_client.post("/speaker_commands/", json=test_data)
+        
+        response = test_client.get("/speaker_commands/stream", params={"format": "json"})
+        
+        assert response.status_code == 200
+        commands = json.loads(response.text)
+        assert sorted(command["command_name"] for command in commands) == ["command_1", "command_2"]
+    
+    def test_get_all_speaker_commands_cached(self, test_client: TestClient):
+        """Test that all=true is served from the cache and invalidated by writes"""
+        test_client.post("/speaker_commands/", json={"data": [{"command_name": "first", "command_vocal": ["un"]}]})
+        version_before = test_client.get("/speaker_commands/version").json()["data"]["version"]
+        
+        assert len(test_client.get("/speaker_commands/", params={"all": True}).json()["data"]) == 1
+        assert len(test_client.get("/speaker_commands/", params={"all": True}).json()["data"]) == 1
+        stats = test_client.get("/speaker_commands/version").json()["data"]
+        assert stats["misses"] == 1
+        assert stats["hits"] == 1
+        
+        test_client.post("/speaker_commands/", json={"data": [{"command_name": "second", "command_vocal": ["deux"]}]})
+        
+        assert len(test_client.get("/speaker_commands/", params={"all": True}).json()["data"]) == 2
+        assert test_client.get("/speaker_commands/version").json()["data"]["version"] == version_before + 1
+    
+    def test_command_cache_ignores_load_raced_by_invalidate(self, test_client: TestClient, mocker):
+        """Test that a list loaded while a write invalidated the cache is not cached"""
+        from app.database import command_cache
+        repository = test_client.app.state.speaker_commands
+        find_shaped = command_cache.find_shaped
+        
+        async def find_then_write(collection, collection_name):
+            commands = await find_shaped(collection, collection_name)
+            # A write lands (and invalidates) while the stale list is in flight
+            await repository.insert([{"id_command": 900, "command_name": "late", "command_vocal": ["tard"]}])
+            return commands
+        
+        mocker.patch.object(command_cache, "find_shaped", find_then_write)
+        assert test_client.get("/speaker_commands/", params={"all": True}).json()["data"] == []
+        mocker.patch.object(command_cache, "find_shaped", find_shaped)
+        
+        assert len(test_client.get("/speaker_commands/", params={"all": True}).json()["data"]) == 1
+    
+    def test_conditional_get_sees_writes_from_other_workers(self, test_client: TestClient, test_db):
+        """Test that If-None-Match is checked against COUNTERS, not the worker's cached version"""
+        test_client.post("/speaker_commands/", json={"data": [{"command_name": "first", "command_vocal": ["un"]}]})
+        etag = test_client.get("/speaker_commands/", params={"all": True}).headers["etag"]
+        assert test_client.get("/speaker_commands/", params={"all": True}, headers={"If-None-Match": etag}).status_code == 304
+        
+        # Another worker inserts a command and bumps the shared version
+        now = datetime.now()
+        test_db["COMMANDS_TEST"].insert_one({
+            "id_command": 900, "command_name": "second", "command_vocal": ["deux"],
+            "schema_version": "1.0.1", "created_at": now, "updated_at": now
+        })
+        test_db["COUNTERS_TEST"].update_one({"_id": "COMMANDS_version"}, {"$inc": {"seq": 1}})
+        
+        response = test_client.get("/speaker_commands/", params={"all": True}, headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+        assert len(response.json()["data"]) == 2
+    
     def test_get_empty_speaker_commands(self, test_client: TestClient):
         """Test getting speaker commands when none exist"""
         response = test_client.get("/speaker_commands/")
@@ -63,6 +63,45 @@ class TestSpeakerNote:
         second_note = response_data["data"][1]
         assert second_note["id_note"] == first_note["id_note"] + 1
     
+    def test_create_speaker_notes_consecutive_batches(self, test_client: TestClient):
+        """Test that consecutive batches get distinct, contiguous id_note blocks"""
+        first_batch = {"data": [{"title": f"Note {i}", "content": "content"} for i in range(3)]}
+        second_batch = {"data": [{"title": f"Other {i}", "content": "content"} for i in range(2)]}
+        
+        first_ids = [note["id_note"] for note in test_client.post("/speaker_notes/", json=first_batch).json()["data"]]
+        second_ids = [note["id_note"] for note in test_client.post("/speaker_notes/", json=second_batch).json()["data"]]
+        
+        assert first_ids == list(range(first_ids[0], first_ids[0] + 3))
+        assert second_ids == list(range(first_ids[-1] + 1, first_ids[-1] + 3))
+    
+    def test_create_speaker_notes_chunked_batch(self, test_client: TestClient, mocker):
+        """Test that batches larger than MAX_INSERT_BATCH_SIZE are inserted in chunks"""
+        from app.configs.config import config
+        mocker.patch.object(config, "MAX_INSERT_BATCH_SIZE", 2)
+        test_data = {"data": [{"title": f"Imported {i}", "content": "archive"} for i in range(5)]}
+        
+        response = test_client.post("/speaker_notes/", json=test_data)
+        
+        assert response.json()["status_code"] == 201
+        assert len(response.json()["data"]) == 5
+        assert len(test_client.get("/speaker_notes/").json()["data"]) == 5
+    
+    def test_partial_chunked_insert_bumps_version(self, test_client: TestClient, mocker):
+        """Test that a chunk failing after earlier chunks were written still invalidates the version"""
+        from pymongo.errors import BulkWriteError
+        from app.configs.config import config
+        mocker.patch.object(config, "MAX_INSERT_BATCH_SIZE", 2)
+        repository = test_client.app.state.speaker_notes
+        version = test_client.portal.call(repository.version)
+        # id_note is unique: the second chunk fails after the first one was written
+        documents = [{"id_note": id_note, "title": "Imported", "content": "archive"} for id_note in (900, 901, 900)]
+        
+        with pytest.raises(BulkWriteError):
+            test_client.portal.call(repository.insert, documents)
+        
+        assert test_client.portal.call(repository.version) > version
+        assert len(test_client.get("/speaker_notes/").json()["data"]) == 2
+    
     def test_create_speaker_note_missing_title(self, test_client: TestClient):
         """Test creating speaker note with missing title"""
         test_data = {
@@ -117,6 +156,136 @@ class TestSpeakerNote:
         assert response_data["message"] == "Speaker notes retrieved successfully"
         assert len(response_data["data"]) == 2
     
+    def test_get_speaker_notes_keyset_pagination(self, test_client: TestClient):
+        """Test walking all notes page by page with next_cursor"""
+        test_data = {"data": [{"title": f"Note {i}", "content": f"Content {i}"} for i in range(5)]}
+        created_ids = [note["id_note"] for note in test_client.post("/speaker_notes/", json=test_data).json()["data"]]
+        
+        seen_ids = []
+        params = {"limit": 2}
+        while True:
+            response_data = test_client.get("/speaker_notes/", params=params).json()
+            assert response_data["status_code"] == 200
+            assert len(response_data["data"]) <= 2
+            seen_ids.extend(note["id_note"] for note in response_data["data"])
+            if not response_data["next_cursor"]:
+                break
+            params["after"] = response_data["next_cursor"]
+        
+        # Later notes have a later (or equal) updated_at and a higher id_note
+        assert seen_ids == sorted(created_ids, reverse=True)
+    
+    @pytest.mark.parametrize("sort", ["desc", "asc"])
+    @pytest.mark.parametrize("params", [{"view": "summary"}, {"fields": "title"}])
+    def test_keyset_pagination_with_legacy_notes_without_updated_at(self, test_client: TestClient, test_db, sort, params):
+        """Test that notes without updated_at (sorted as null) are paged exactly once in both orders"""
+        dated_ids = [note["id_note"] for note in test_client.post("/speaker_notes/", json={"data": [{"title": f"Note {i}", "content": "c"} for i in range(3)]}).json()["data"]]
+        test_db["SPEAKER_NOTES_TEST"].insert_many([{"id_note": 900 + i, "title": f"Legacy {i}", "content": "ancienne"} for i in range(3)])
+        legacy_ids = [900, 901, 902]
+        
+        seen_ids = []
+        params = {**params, "limit": 2, "sort": sort}
+        while True:
+            response = test_client.get("/speaker_notes/", params=params)
+            assert response.status_code == 200
+            response_data = response.json()
+            seen_ids.extend(note["id_note"] for note in response_data["data"])
+            if not response_data["next_cursor"]:
+                break
+            params["after"] = response_data["next_cursor"]
+        
+        # Null sorts below every date: legacy notes come last in desc order and first in asc order
+        expected = sorted(dated_ids, reverse=True) + sorted(legacy_ids, reverse=True)
+        assert seen_ids == (expected if sort == "desc" else expected[::-1])
+    
+    def test_get_speaker_notes_all_flag(self, test_client: TestClient):
+        """Test that all=true returns every note without a cursor"""
+        test_data = {"data": [{"title": f"Note {i}", "content": "content"} for i in range(3)]}
+        test_client.post("/speaker_notes/", json=test_data)
+        
+        response_data = test_client.get("/speaker_notes/", params={"all": True, "limit": 1}).json()
+        
+        assert len(response_data["data"]) == 3
+        assert response_data["next_cursor"] is None
+    
+    def test_get_speaker_notes_invalid_cursor(self, test_client: TestClient):
+        """Test that a malformed cursor is rejected"""
+        response = test_client.get("/speaker_notes/", params={"after": "not-a-cursor"})
+        
+        assert response.json()["status_code"] == 400
+    
+    def test_get_speaker_notes_summary_view(self, test_client: TestClient):
+        """Test that the summary view returns a capped preview instead of the full content"""
+        from app.configs.config import config
+        long_content = "dictée " * 500
+        test_client.post("/speaker_notes/", json={"data": [{"title": "Long note", "content": long_content}]})
+        
+        response_data = test_client.get("/speaker_notes/", params={"view": "summary"}).json()
+        
+        summary = response_data["data"][0]
+        assert "content" not in summary
+        assert summary["title"] == "Long note"
+        assert summary["preview"] == long_content[:config.NOTE_PREVIEW_LENGTH]
+        assert summary["word_count"] == 500
+        assert "id_note" in summary and "updated_at" in summary
+    
+    def test_get_speaker_notes_fields_projection(self, test_client: TestClient):
+        """Test that fields= only returns the requested fields (plus keyset fields)"""
+        test_client.post("/speaker_notes/", json={"data": [{"title": "Note", "content": "Content", "commands": ["save"]}]})
+        
+        note = test_client.get("/speaker_notes/", params={"fields": "title"}).json()["data"][0]
+        
+        assert note["title"] == "Note"
+        assert "content" not in note
+        assert "commands" not in note
+        
+        response_data = test_client.get("/speaker_notes/", params={"fields": "title,unknown"}).json()
+        assert response_data["status_code"] == 400
+    
+    def test_stream_speaker_notes_ndjson(self, test_client: TestClient):
+        """Test streaming notes as NDJSON, one note per line"""
+        test_data = {"data": [{"title": f"Note {i}", "content": f"Content {i}"} for i in range(3)]}
+        test_client.post("/speaker_notes/", json=test_data)
+        
+        response = test_client.get("/speaker_notes/stream")
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        notes = [json.loads(line) for line in response.text.splitlines()]
+        assert sorted(note["title"] for note in notes) == ["Note 0", "Note 1", "Note 2"]
+        assert all(isinstance(note["_id"], str) for note in notes)
+    
+    def test_get_speaker_notes_conditional_get(self, test_client: TestClient):
+        """Test that If-None-Match answers 304 until the notes change"""
+        test_client.post("/speaker_notes/", json={"data": [{"title": "Note", "content": "Content"}]})
+        
+        first_response = test_client.get("/speaker_notes/")
+        etag = first_response.headers["etag"]
+        
+        cached_response = test_client.get("/speaker_notes/", headers={"If-None-Match": etag})
+        assert cached_response.status_code == 304
+        assert cached_response.content == b""
+        
+        # Different query parameters get a different ETag
+        assert test_client.get("/speaker_notes/", params={"limit": 1}).headers["etag"] != etag
+        
+        test_client.post("/speaker_notes/", json={"data": [{"title": "Other", "content": "Content"}]})
+        changed_response = test_client.get("/speaker_notes/", headers={"If-None-Match": etag})
+        assert changed_response.status_code == 200
+        assert len(changed_response.json()["data"]) == 2
+    
+    def test_etag_changes_with_application_version(self, test_client: TestClient, mocker):
+        """Test that a deploy of a new application version invalidates the ETags of unchanged data"""
+        from app.configs.config import config
+        test_client.post("/speaker_notes/", json={"data": [{"title": "Note", "content": "Content"}]})
+        etag = test_client.get("/speaker_notes/").headers["etag"]
+        
+        mocker.patch.object(config, "CURRENT_APPLICATION_VERSION", "99.0.0")
+        response = test_client.get("/speaker_notes/", headers={"If-None-Match": etag})
+        
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+    
     def test_get_empty_speaker_notes(self, test_client: TestClient):
         """Test getting speaker notes when none exist"""
         response = test_client.get("/speaker_notes/")
@@ -165,6 +334,22 @@ class TestSpeakerNote:
         assert updated_note["content"] == "Updated content"
         assert updated_note["commands"] == ["save"]  # Should keep original commands
     
+    def test_update_single_legacy_note_is_shaped(self, test_client: TestClient, test_db):
+        """Test that a single update returns the same shaped post-image as a batch update"""
+        from datetime import datetime
+        now = datetime.now()
+        test_db["SPEAKER_NOTES_TEST"].insert_one({
+            "id_note": 900, "title": "Legacy", "content": "Written before previews existed",
+            "commands": [], "schema_version": "1.0.0", "created_at": now, "updated_at": now
+        })
+        
+        response = test_client.put("/speaker_notes/", json={"data": [{"id_note": 900, "title": "Renamed"}]})
+        
+        updated_note = response.json()["data"][0]
+        assert updated_note["title"] == "Renamed"
+        assert updated_note["preview"] == "Written before previews existed"
+        assert isinstance(updated_note["_id"], str)
+    
     def test_update_nonexistent_speaker_note(self, test_client: TestClient):
         """Test updating a speaker note that doesn't exist"""
         update_data = {
@@ -183,6 +368,28 @@ class TestSpeakerNote:
         assert response_data["status_code"] == 404
         assert "not found" in response_data["message"]
     
+    def test_update_speaker_notes_partial_not_found(self, test_client: TestClient):
+        """Test that a missing id is reported without cutting the rest of the batch short"""
+        create_data = {"data": [{"title": "First", "content": "a"}, {"title": "Second", "content": "b"}]}
+        created_notes = test_client.post("/speaker_notes/", json=create_data).json()["data"]
+        
+        update_data = {
+            "data": [
+                {"id_note": created_notes[0]["id_note"], "title": "First updated"},
+                {"id_note": 99999, "title": "Missing"},
+                {"id_note": created_notes[1]["id_note"], "content": "b updated"}
+            ]
+        }
+        
+        response = test_client.put("/speaker_notes/", json=update_data)
+        
+        response_data = response.json()
+        assert response_data["status_code"] == 404
+        assert "99999" in response_data["message"]
+        assert [note["id_note"] for note in response_data["data"]] == [created_notes[0]["id_note"], created_notes[1]["id_note"]]
+        assert response_data["data"][0]["title"] == "First updated"
+        assert response_data["data"][1]["content"] == "b updated"
+    
     def test_delete_speaker_note(self, test_client: TestClient):
         """Test deleting a specific speaker note"""
         # First create a note
@@ -8,6 +8,7 @@ export interface BaseResponse<T = any> {
   data: T | null;
   status_code: number;
   message: string;
+  next_cursor?: string | null;
 }
 
 /**
@@ -55,7 +55,7 @@ export class SpeakerCommandService {
   async getAllCommandsFromAPI(): Promise<BaseResponse<SpeakerCommand[]>> {
     try {
       const response: AxiosResponse<BaseResponse<SpeakerCommand[]>> =
-        await this.axiosInstance.get('/')
+        await this.axiosInstance.get('/', { params: { all: true } })
 
       if (!ResponseValidator.isBaseResponse<SpeakerCommand[]>(response.data)) {
         throw new Error('Invalid response format')
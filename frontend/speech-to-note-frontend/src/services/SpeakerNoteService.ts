@@ -54,7 +54,10 @@ export class SpeakerNoteService {
    */
   async getAllNotesFromAPI(): Promise<BaseResponse<SpeakerNote[]>> {
     try {
-      const response: AxiosResponse<BaseResponse<SpeakerNote[]>> = await this.axiosInstance.get('/')
+      const response: AxiosResponse<BaseResponse<SpeakerNote[]>> = await this.axiosInstance.get(
+        '/',
+        { params: { all: true } },
+      )
 
       if (!ResponseValidator.isBaseResponse<SpeakerNote[]>(response.data)) {
         throw new Error('Invalid response format')
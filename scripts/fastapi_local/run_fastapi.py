@@ -9,8 +9,9 @@ backend_dir = os.path.abspath(backend_dir)
 
 print(f"📁 Répertoire backend: {backend_dir}")
 
+# CURRENT_ENV=local -> mode dev (un worker, --reload) ; passer --mode production pour tester le mode conteneur
 cmd = [
-    "uv", "run","uvicorn", "app.main:app", "--reload", "--host", "127.0.0.1", "--port", "8000"
+    "uv", "run", "python", "-m", "app.serve", "--host", "127.0.0.1", "--port", "8000", *sys.argv[1:]
 ]
 
 print("🚀 Lancement de l'API FastAPI en local")